@@ -1,5 +1,7 @@
+from django import forms
 from django.contrib import admin
-from .models import Room, Guest, Booking, Hotel, UserProfile
+from .inventory import nights_between
+from .models import Room, Guest, Booking, Hotel, UserProfile, OutboxEvent, RoomNight, HotelDailyStats
 
 
 @admin.register(UserProfile)
@@ -32,6 +34,7 @@ class HotelAdmin(admin.ModelAdmin):
 @admin.register(Room)
 class RoomAdmin(admin.ModelAdmin):
     list_display = ('hotel', 'number', 'name', 'type_name', 'price_per_night', 'created_at')
+    list_select_related = ('hotel',)
     list_filter = ('type_name', 'hotel', 'created_at')
     search_fields = ('number', 'name', 'type_name', 'hotel__name')
     readonly_fields = ('room_id', 'created_at', 'updated_at')
@@ -64,9 +67,38 @@ class GuestAdmin(admin.ModelAdmin):
     )
 
 
+class BookingAdminForm(forms.ModelForm):
+    """Проверка ночей до сохранения: занятые ночи — ошибка формы, а не NightsUnavailable из сигнала."""
+
+    class Meta:
+        model = Booking
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        room = cleaned_data.get('room')
+        check_in_date = cleaned_data.get('check_in_date')
+        check_out_date = cleaned_data.get('check_out_date')
+        status = cleaned_data.get('status', self.instance.status)
+        if room and check_in_date and check_out_date and status != Booking.STATUS_CANCELLED:
+            taken = (
+                RoomNight.objects.filter(room=room, night__in=nights_between(check_in_date, check_out_date))
+                .exclude(booking_id=self.instance.pk)
+                .order_by('night')
+                .values_list('night', flat=True)
+            )
+            if taken:
+                raise forms.ValidationError(
+                    "Номер уже занят в ночи: " + ', '.join(night.strftime('%d.%m.%Y') for night in taken)
+                )
+        return cleaned_data
+
+
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
+    form = BookingAdminForm
     list_display = ('booking_id', 'user', 'guest', 'room', 'check_in_date', 'check_out_date', 'total_price', 'created_at')
+    list_select_related = ('user', 'guest', 'room__hotel')
     list_filter = ('check_in_date', 'check_out_date', 'created_at', 'room__type_name')
     search_fields = ('guest__last_name', 'guest__first_name', 'room__number', 'room__name', 'user__username')
     readonly_fields = ('booking_id', 'created_at', 'updated_at', 'total_price')
@@ -85,3 +117,25 @@ class BookingAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at')
         }),
     )
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'topic', 'attempts', 'created_at', 'sent_at', 'claimed_until')
+    list_filter = ('topic', 'sent_at')
+    readonly_fields = ('event_id', 'created_at')
+
+
+@admin.register(RoomNight)
+class RoomNightAdmin(admin.ModelAdmin):
+    list_display = ('room', 'night', 'booking')
+    list_filter = ('night',)
+    search_fields = ('room__number', 'room__name')
+    raw_id_fields = ('room', 'booking')
+
+
+@admin.register(HotelDailyStats)
+class HotelDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('hotel', 'date', 'rooms_sold', 'revenue', 'paid_revenue')
+    list_filter = ('hotel',)
+    date_hierarchy = 'date'
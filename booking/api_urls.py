@@ -4,8 +4,13 @@ from . import views_api
 urlpatterns = [
     path("health/", views_api.api_health),
     path("metrics/", views_api.api_metrics),
+    path("availability/", views_api.api_availability_search),
     path("bookings/", views_api.api_bookings_list_or_create),
+    path("bookings/batch/", views_api.api_create_bookings_batch),
     path("bookings/<int:booking_id>/", views_api.api_get_booking),
     path("bookings/<int:booking_id>/confirm-payment/", views_api.api_confirm_payment),
     path("bookings/<int:booking_id>/cancel/", views_api.api_cancel_booking),
+    path("guests/suggest/", views_api.api_guest_suggest),
+    path("hotels/<int:hotel_id>/calendar/", views_api.api_hotel_calendar),
+    path("hotels/<int:hotel_id>/stats/", views_api.api_hotel_stats),
 ]
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class BookingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'booking'
+
+    def ready(self):
+        # Подключаем профиль соединений БД и обработчики сигналов индексов (занятость, гости), инвентаря ночей, сводок, счётчиков и кэша каталога
+        from . import availability, catalogue, counters, db_profile, guest_index, inventory, occupancy, rollups  # noqa: F401
+        from .metrics import cleanup_stale_files
+
+        # Live-gauge файлы завершившихся процессов (режим PROMETHEUS_MULTIPROC_DIR)
+        cleanup_stale_files()
@@ -0,0 +1,161 @@
+"""
+Процессный индекс занятости номеров.
+
+Для каждого номера хранится отсортированный по дате заезда массив забронированных
+интервалов (без отменённых бронирований). Пересечения ищутся бинарным поиском.
+Сигналы Booking/Room сбрасывают запись номера, и она лениво перестраивается
+при следующем обращении.
+"""
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .metrics import AVAILABILITY_INDEX_HITS, AVAILABILITY_INDEX_MISSES, AVAILABILITY_INDEX_REBUILDS
+from .models import BOOKING_UNCHANGED, Booking, Room
+
+
+class RoomAvailability:
+    """Занятость одного номера: интервалы [check_in, check_out), отсортированные по заезду."""
+
+    __slots__ = ('room_id', 'price_per_night', 'starts', 'ends', 'max_ends', 'built_at')
+
+    def __init__(self, room_id, price_per_night, intervals, built_at):
+        self.room_id = room_id
+        self.price_per_night = price_per_night
+        self.starts = [check_in for check_in, _ in intervals]
+        self.ends = [check_out for _, check_out in intervals]
+        # Префиксный максимум дат выезда: монотонен, поэтому по нему тоже можно искать бинарно,
+        # даже если в данных есть пересекающиеся бронирования.
+        self.max_ends = []
+        current = None
+        for check_out in self.ends:
+            current = check_out if current is None or check_out > current else current
+            self.max_ends.append(current)
+        self.built_at = built_at
+
+    def conflicts(self, check_in_date, check_out_date):
+        """Интервалы, пересекающиеся с [check_in_date, check_out_date), по возрастанию заезда."""
+        hi = bisect_left(self.starts, check_out_date)
+        lo = bisect_right(self.max_ends, check_in_date, 0, hi)
+        return [
+            (self.starts[i], self.ends[i])
+            for i in range(lo, hi)
+            if self.ends[i] > check_in_date
+        ]
+
+    def is_available(self, check_in_date, check_out_date):
+        return not self.conflicts(check_in_date, check_out_date)
+
+
+class AvailabilityIndex:
+    """Потокобезопасный кэш RoomAvailability по room_id."""
+
+    def __init__(self):
+        self._rooms = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        # Ограничивает устаревание, когда бронирование создано в другом процессе
+        return getattr(settings, 'AVAILABILITY_INDEX_TTL', 30)
+
+    def _lookup(self, room_id):
+        entry = self._rooms.get(room_id)
+        if entry is not None and time.monotonic() - entry.built_at < self.ttl:
+            AVAILABILITY_INDEX_HITS.inc()
+            return entry, None
+        AVAILABILITY_INDEX_MISSES.inc()
+        with self._lock:
+            return None, self._generations.get(room_id, 0)
+
+    def _store(self, room_id, generation, price_per_night, intervals):
+        entry = RoomAvailability(room_id, price_per_night, intervals, time.monotonic())
+        with self._lock:
+            # Если запись успели сбросить во время чтения из БД, не кэшируем устаревшие данные
+            if self._generations.get(room_id, 0) == generation:
+                self._rooms[room_id] = entry
+                AVAILABILITY_INDEX_REBUILDS.inc()
+        return entry
+
+    @staticmethod
+    def _intervals_queryset(room_id):
+        return (
+            Booking.objects.filter(room_id=room_id)
+            .exclude(status=Booking.STATUS_CANCELLED)
+            .order_by('check_in_date')
+            .values_list('check_in_date', 'check_out_date')
+        )
+
+    def get(self, room_id):
+        """Занятость номера; при промахе читает БД. Room.DoesNotExist, если номера нет."""
+        room_id = int(room_id)
+        entry, generation = self._lookup(room_id)
+        if entry is not None:
+            return entry
+        price = Room.objects.filter(pk=room_id).values_list('price_per_night', flat=True).get()
+        intervals = list(self._intervals_queryset(room_id))
+        return self._store(room_id, generation, price, intervals)
+
+    async def aget(self, room_id):
+        """Асинхронный вариант get() для async-представлений."""
+        room_id = int(room_id)
+        entry, generation = self._lookup(room_id)
+        if entry is not None:
+            return entry
+        price = await Room.objects.filter(pk=room_id).values_list('price_per_night', flat=True).aget()
+        intervals = [row async for row in self._intervals_queryset(room_id)]
+        return self._store(room_id, generation, price, intervals)
+
+    def conflicts(self, room_id, check_in_date, check_out_date):
+        return self.get(room_id).conflicts(check_in_date, check_out_date)
+
+    def is_available(self, room_id, check_in_date, check_out_date):
+        return self.get(room_id).is_available(check_in_date, check_out_date)
+
+    def invalidate(self, *room_ids):
+        with self._lock:
+            for room_id in room_ids:
+                if room_id is None:
+                    continue
+                self._rooms.pop(room_id, None)
+                self._generations[room_id] = self._generations.get(room_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            for room_id in list(self._rooms):
+                self._generations[room_id] = self._generations.get(room_id, 0) + 1
+            self._rooms.clear()
+
+
+availability_index = AvailabilityIndex()
+
+
+def invalidate_rooms(*room_ids):
+    """Сбрасывает записи сразу и ещё раз после коммита (на случай чтения из другого потока до коммита)."""
+    availability_index.invalidate(*room_ids)
+    transaction.on_commit(lambda: availability_index.invalidate(*room_ids))
+
+
+@receiver(post_save, sender=Booking)
+def _booking_saved(sender, instance, **kwargs):
+    # При переносе брони сбрасываем и прежний номер (models.remember_stored_booking)
+    stored = getattr(instance, '_stored_state', None)
+    previous_room_id = stored['room_id'] if stored and stored is not BOOKING_UNCHANGED else None
+    invalidate_rooms(instance.room_id, previous_room_id)
+
+
+@receiver(post_delete, sender=Booking)
+def _booking_deleted(sender, instance, **kwargs):
+    invalidate_rooms(instance.room_id)
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def _room_changed(sender, instance, **kwargs):
+    invalidate_rooms(instance.pk)
@@ -0,0 +1,149 @@
+"""
+Кэш каталога номеров (страницы /rooms/ и /rooms/<pk>/, форма бронирования).
+
+Списки номеров и выпадающие фильтры хранятся в
+кэше Django под ключом с поколением каталога и параметрами запроса: список
+номеров — отдельно число номеров и каждая страница, чтобы запрос страницы не
+читал из кэша весь отфильтрованный список. Карточка номера и его подпись для
+формы бронирования — под ключами с его pk; поиск номеров для формы идёт в БД.
+Сигналы Room/Hotel сбрасывают карточки затронутых номеров и увеличивают
+поколение списков, поэтому устаревшие страницы больше не читаются.
+"""
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Hotel, Room
+from .search import matching
+
+GENERATION_KEY = 'booking:catalogue:generation'
+
+
+def _generation():
+    return cache.get_or_set(GENERATION_KEY, 1, timeout=None)
+
+
+def _list_key(name, **params):
+    # Параметры запроса произвольные (кириллица, пробелы) — в ключ идёт их хэш
+    digest = hashlib.md5(urlencode(sorted(params.items())).encode('utf-8')).hexdigest()
+    return f'booking:catalogue:{_generation()}:{name}:{digest}'
+
+
+def _room_key(room_id):
+    return f'booking:catalogue:room:{room_id}'
+
+
+def _choice_key(room_id):
+    return f'booking:catalogue:choice:{room_id}'
+
+
+def _cached(key, compute):
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout=settings.CATALOGUE_CACHE_TTL)
+    return value
+
+
+class RoomList:
+    """Номера каталога для Paginator: число номеров и срез страницы кэшируются по отдельности."""
+
+    def __init__(self, room_type='', hotel_id=''):
+        self.filters = {'type': room_type, 'hotel': hotel_id}
+
+    def _queryset(self):
+        queryset = Room.objects.select_related('hotel').all()
+        if self.filters['type']:
+            queryset = queryset.filter(type_name__icontains=self.filters['type'])
+        if self.filters['hotel']:
+            queryset = queryset.filter(hotel_id=self.filters['hotel'])
+        return queryset
+
+    def __len__(self):
+        return _cached(_list_key('rooms-count', **self.filters), lambda: self._queryset().count())
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        return _cached(
+            _list_key('rooms-page', start=key.start or 0, stop=key.stop, **self.filters),
+            lambda: list(self._queryset()[key]),
+        )
+
+
+def room_list(room_type='', hotel_id=''):
+    """Номера каталога (с отелем) с учётом фильтров ?type= и ?hotel=; страницы читаются из кэша по одной."""
+    return RoomList(room_type, hotel_id)
+
+
+def room_filters():
+    """Значения выпадающих фильтров каталога: (типы номеров, отели)."""
+    return _cached(_list_key('filters'), lambda: (
+        list(Room.objects.values_list('type_name', flat=True).distinct()),
+        list(Hotel.objects.all()),
+    ))
+
+
+def room_detail(room_id):
+    """Номер с отелем для карточки; Room.DoesNotExist, если номера нет."""
+    return _cached(_room_key(room_id), lambda: Room.objects.select_related('hotel').get(pk=room_id))
+
+
+_CHOICE_FIELDS = ('hotel__name', 'name', 'number', 'price_per_night')
+
+
+def _choice(hotel_name, name, number, price):
+    return f"{hotel_name} - {name} ({number}) - {price} ₽/ночь", float(price)
+
+
+def room_choice(room_id):
+    """(подпись, цена за ночь) номера для формы бронирования; None, если номера нет или он без отеля."""
+    def compute():
+        row = Room.objects.filter(pk=room_id, hotel__isnull=False).values_list(*_CHOICE_FIELDS).first()
+        return _choice(*row) if row else None
+
+    return _cached(_choice_key(room_id), compute)
+
+
+def search_room_choices(query, limit):
+    """Первые limit номеров с отелем по query: [(pk, подпись, цена за ночь)] по отелю и номеру, один запрос.
+
+    Номер и название ищутся по индексу поиска (префиксы слов, без учёта регистра), отель — по вхождению.
+    """
+    rooms = Room.objects.filter(hotel__isnull=False)
+    if query:
+        rooms = rooms.filter(Q(pk__in=matching(Room, query)) | Q(hotel__name__icontains=query))
+    rows = rooms.order_by('hotel__name', 'number').values_list('pk', *_CHOICE_FIELDS)[:limit]
+    return [(pk, *_choice(*fields)) for pk, *fields in rows]
+
+
+def invalidate_catalogue(*room_ids):
+    """Сбрасывает карточки номеров и все списки каталога (сразу и после коммита)."""
+    def invalidate():
+        cache.delete_many([key(room_id) for room_id in room_ids for key in (_room_key, _choice_key)])
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, 2, timeout=None)
+
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def _room_changed(sender, instance, **kwargs):
+    invalidate_catalogue(instance.pk)
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_delete, sender=Hotel)
+def _hotel_changed(sender, instance, **kwargs):
+    # Название отеля показывается в карточках его номеров
+    invalidate_catalogue(*instance.rooms.values_list('pk', flat=True))
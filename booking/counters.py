@@ -0,0 +1,79 @@
+"""
+Кэшированные счётчики каталога для главной страницы и панели организации.
+
+Итоги (номера, гости, бронирования — всего и по владельцу отелей) хранятся в
+кэше Django под ключом с номером поколения. Сигналы создания/удаления Hotel,
+Room, Guest и Booking увеличивают поколение, и старые значения перестают
+читаться; следующий запрос пересчитывает их одним обращением к БД.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Booking, Guest, Hotel, Room
+
+GENERATION_KEY = 'booking:counters:generation'
+
+
+def _generation():
+    return cache.get_or_set(GENERATION_KEY, 1, timeout=None)
+
+
+def _cached(name, compute):
+    key = f'booking:counters:{_generation()}:{name}'
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout=settings.COUNTERS_CACHE_TTL)
+    return value
+
+
+def catalogue_counts():
+    """Общее число номеров, гостей и бронирований: {'rooms', 'guests', 'bookings'}."""
+    return _cached('catalogue', lambda: {
+        'rooms': Room.objects.count(),
+        'guests': Guest.objects.count(),
+        'bookings': Booking.objects.count(),
+    })
+
+
+def owner_counts(owner_id):
+    """Число отелей, номеров и бронирований владельца: {'hotels', 'rooms', 'bookings'}."""
+    return _cached(f'owner:{owner_id}', lambda: {
+        'hotels': Hotel.objects.filter(owner_id=owner_id).count(),
+        'rooms': Room.objects.filter(hotel__owner_id=owner_id).count(),
+        'bookings': Booking.objects.filter(room__hotel__owner_id=owner_id).count(),
+    })
+
+
+def invalidate_counters():
+    """Делает все закэшированные счётчики устаревшими (сразу и после коммита)."""
+    def bump():
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, 2, timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_save, sender=Room)
+@receiver(post_save, sender=Guest)
+@receiver(post_save, sender=Booking)
+def _counted_model_saved(sender, instance, created, **kwargs):
+    # Смена статуса бронирования или цены номера счётчики не меняет;
+    # у номера может смениться отель, поэтому его правки тоже учитываем
+    if created or sender is Room:
+        invalidate_counters()
+
+
+@receiver(post_delete, sender=Hotel)
+@receiver(post_delete, sender=Room)
+@receiver(post_delete, sender=Guest)
+@receiver(post_delete, sender=Booking)
+def _counted_model_deleted(sender, instance, **kwargs):
+    invalidate_counters()
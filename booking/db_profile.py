@@ -0,0 +1,76 @@
+"""
+Профиль соединений SQLite: прагмы из settings.SQLITE_* на каждом новом соединении.
+
+journal_mode=WAL сохраняется в файле БД, остальные прагмы действуют только
+в пределах соединения, поэтому выполняются при каждом подключении. Для серверных
+СУБД профиль задаётся в settings.DATABASES (постоянные соединения или пул).
+
+Кроме того, на каждое соединение ставится execute_wrapper учёта запросов:
+внутри track_queries() он считает SQL-запросы и время в БД. Текущий учёт
+хранится в contextvar, поэтому запросы async-представлений, выполненные в потоке
+sync_to_async (с общим для процесса соединением), засчитываются своему запросу.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def sqlite_pragmas():
+    """Прагмы профиля в порядке выполнения."""
+    return [
+        f'PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}',
+        f'PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}',
+        f'PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}',
+        f'PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}',
+        # Отрицательное значение — размер в КиБ, а не в страницах
+        f'PRAGMA cache_size = -{int(settings.SQLITE_CACHE_SIZE_KIB)}',
+    ]
+
+
+class QueryStats:
+    """Число SQL-запросов и суммарное время в БД (секунды)."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+_current_stats = ContextVar('query_stats', default=None)
+
+
+@contextmanager
+def track_queries():
+    """Учитывает запросы ко всем БД внутри блока (включая sync_to_async): with track_queries() as stats."""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.duration += time.perf_counter() - start
+        stats.count += 1
+
+
+@receiver(connection_created)
+def _setup_connection(sender, connection, **kwargs):
+    # Объект DatabaseWrapper переживает переподключения — обёртку ставим один раз
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+    if connection.vendor != 'sqlite':
+        return
+    for pragma in sqlite_pragmas():
+        connection.connection.execute(pragma)
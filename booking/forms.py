@@ -3,6 +3,8 @@ from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
+from . import catalogue
+from .availability import availability_index
 from .models import Room, Guest, Booking, Hotel, UserProfile
 
 
@@ -32,14 +34,22 @@ class BookingForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Показываем номера с информацией об отеле
-        self.fields['room'].queryset = Room.objects.select_related('hotel').filter(hotel__isnull=False)
-        
-        def room_label(obj):
-            hotel_name = obj.hotel.name if obj.hotel else "Без отеля"
-            return f"{hotel_name} - {obj.name} ({obj.number}) - {obj.price_per_night} ₽/ночь"
-        
-        self.fields['room'].label_from_instance = room_label
+        self.fields['room'].queryset = Room.objects.filter(hotel__isnull=False)
+        # В разметку попадает только выбранный номер; остальные подгружает поиск (room_picker),
+        # поэтому страница не содержит весь каталог
+        selected = [(pk, catalogue.room_choice(pk)) for pk in self.selected_room_ids()]
+        self.fields['room'].widget.choices = [('', '---------')] + [
+            (pk, choice[0]) for pk, choice in selected if choice
+        ]
+
+    def selected_room_ids(self):
+        """pk выбранного номера (из POST или initial) списком — пустым, если номер не выбран."""
+        value = self.data.get(self.add_prefix('room')) if self.is_bound else self.initial.get('room')
+        value = getattr(value, 'pk', value)
+        try:
+            return [int(value)]
+        except (TypeError, ValueError):
+            return []
 
     def clean(self):
         cleaned_data = super().clean()
@@ -53,22 +63,16 @@ class BookingForm(forms.ModelForm):
             if check_in_date < timezone.now().date():
                 raise ValidationError("Дата заезда не может быть в прошлом")
             
-            # Проверяем, не занят ли номер в эти даты
+            # Проверяем, не занят ли номер в эти даты (по процессному индексу занятости)
             if room:
-                conflicting_bookings = Booking.objects.filter(
-                    room=room,
-                    check_in_date__lt=check_out_date,
-                    check_out_date__gt=check_in_date
-                ).order_by('check_in_date')
+                conflicting_bookings = availability_index.conflicts(room.pk, check_in_date, check_out_date)
                 
-                if conflicting_bookings.exists():
+                if conflicting_bookings:
                     # Формируем список дат занятости - все даты в одном сообщении
-                    booking_dates = []
-                    for booking in conflicting_bookings:
-                        booking_dates.append(
-                            f"{booking.check_in_date.strftime('%d.%m.%Y')} - {booking.check_out_date.strftime('%d.%m.%Y')}"
-                        )
-                    dates_str = ', '.join(booking_dates)
+                    dates_str = ', '.join(
+                        f"{booked_in.strftime('%d.%m.%Y')} - {booked_out.strftime('%d.%m.%Y')}"
+                        for booked_in, booked_out in conflicting_bookings
+                    )
                     raise ValidationError(
                         f"НОМЕР УЖЕ ЗАНЯТ в это время. Забронирован: {dates_str}. Пожалуйста, выберите другие даты."
                     )
@@ -0,0 +1,140 @@
+"""
+Процессный префиксный индекс гостей для подсказок (GET /api/guests/suggest/).
+
+Фамилия, номер паспорта и телефон гостя нормализуются (нижний регистр, только
+буквы и цифры) и хранятся в отсортированном массиве ключей; все ключи с данным
+префиксом лежат подряд и находятся бинарным поиском. Сигналы Guest обновляют
+индекс точечно, результаты по префиксам кэшируются до следующего изменения.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Guest
+
+GUEST_ROW_FIELDS = ('guest_id', 'last_name', 'first_name', 'middle_name', 'passport_number', 'phone', 'email')
+# Сколько префиксов держать в кэше результатов
+SUGGEST_CACHE_SIZE = 1024
+
+_NON_ALNUM_RE = re.compile(r'[\W_]+')
+
+
+def normalize(value):
+    """'+7 (900) 111-22-33' → '79001112233', 'Иванов-Петров' → 'ивановпетров'."""
+    return _NON_ALNUM_RE.sub('', value or '').casefold()
+
+
+def _keys(row):
+    _, last_name, _, _, passport_number, phone, _ = row
+    return {key for key in (normalize(last_name), normalize(passport_number), normalize(phone)) if key}
+
+
+class GuestPrefixIndex:
+    """Потокобезопасный индекс (ключ, guest_id) с кэшем результатов по префиксу."""
+
+    def __init__(self):
+        self._entries = []
+        self._rows = {}
+        self._results = OrderedDict()
+        self._built_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        # Ограничивает устаревание, когда гостя изменили в другом процессе
+        return getattr(settings, 'GUEST_SUGGEST_TTL', 300)
+
+    def _ensure_built(self):
+        if self._built_at is not None and time.monotonic() - self._built_at < self.ttl:
+            return
+        rows = {row[0]: row for row in Guest.objects.values_list(*GUEST_ROW_FIELDS).iterator(chunk_size=5000)}
+        entries = sorted((key, guest_id) for guest_id, row in rows.items() for key in _keys(row))
+        self._entries, self._rows = entries, rows
+        self._results.clear()
+        self._built_at = time.monotonic()
+
+    def suggest(self, query, limit):
+        """До limit гостей (кортежи GUEST_ROW_FIELDS), у которых фамилия, паспорт или телефон начинаются с query."""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        with self._lock:
+            self._ensure_built()
+            cached = self._results.get((prefix, limit))
+            if cached is not None:
+                self._results.move_to_end((prefix, limit))
+                return cached
+
+            found = []
+            seen = set()
+            position = bisect_left(self._entries, (prefix,))
+            while position < len(self._entries) and len(found) < limit:
+                key, guest_id = self._entries[position]
+                if not key.startswith(prefix):
+                    break
+                if guest_id not in seen:
+                    seen.add(guest_id)
+                    found.append(self._rows[guest_id])
+                position += 1
+
+            self._results[(prefix, limit)] = found
+            if len(self._results) > SUGGEST_CACHE_SIZE:
+                self._results.popitem(last=False)
+            return found
+
+    def _discard(self, guest_id):
+        row = self._rows.pop(guest_id, None)
+        if row is None:
+            return
+        for key in _keys(row):
+            position = bisect_left(self._entries, (key, guest_id))
+            if position < len(self._entries) and self._entries[position] == (key, guest_id):
+                del self._entries[position]
+
+    def update(self, row):
+        """Добавляет или обновляет гостя (кортеж GUEST_ROW_FIELDS)."""
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._discard(row[0])
+            self._rows[row[0]] = row
+            for key in _keys(row):
+                insort(self._entries, (key, row[0]))
+            self._results.clear()
+
+    def remove(self, guest_id):
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._discard(guest_id)
+            self._results.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries, self._rows = [], {}
+            self._results.clear()
+            self._built_at = None
+
+
+guest_index = GuestPrefixIndex()
+
+
+@receiver(post_save, sender=Guest)
+def _guest_saved(sender, instance, **kwargs):
+    row = tuple(getattr(instance, field) for field in GUEST_ROW_FIELDS)
+    guest_index.update(row)
+    transaction.on_commit(lambda: guest_index.update(row))
+
+
+@receiver(post_delete, sender=Guest)
+def _guest_deleted(sender, instance, **kwargs):
+    guest_id = instance.pk
+    guest_index.remove(guest_id)
+    transaction.on_commit(lambda: guest_index.remove(guest_id))
@@ -0,0 +1,121 @@
+"""
+Инвентарь ночей номеров (RoomNight) — защита от двойного бронирования.
+
+Бронирование занимает свои ночи одним bulk insert; уникальный индекс
+(room, night) не даёт двум бронированиям занять одну ночь, даже если запросы
+выполняются параллельно в разных процессах, — проигравший получает
+IntegrityError, который превращается в NightsUnavailable. Ночи ведутся сигналами
+Booking при любом save(): создание занимает их, смена номера или дат переносит,
+отмена освобождает, снятие отмены занимает снова; удаление — каскадом.
+bulk_create сигналов не отправляет — для пакетов есть claim_nights_bulk.
+Каждое изменение после коммита отражается в битовой карте занятости (occupancy).
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from . import occupancy
+from .models import BOOKING_UNCHANGED, Booking, RoomNight
+
+
+class NightsUnavailable(Exception):
+    """Часть ночей уже занята; conflicts — интервалы (заезд, выезд) мешающих бронирований."""
+
+    def __init__(self, conflicts):
+        super().__init__('Room is already booked for these dates')
+        self.conflicts = conflicts
+
+
+def nights_between(check_in_date, check_out_date):
+    """Ночи проживания: от даты заезда включительно до даты выезда, не включая её."""
+    return [check_in_date + timedelta(days=offset) for offset in range((check_out_date - check_in_date).days)]
+
+
+def _night_rows(booking):
+    return [
+        RoomNight(room_id=booking.room_id, night=night, booking=booking)
+        for night in nights_between(booking.check_in_date, booking.check_out_date)
+    ]
+
+
+def conflicting_intervals(room_id, check_in_date, check_out_date):
+    """Даты бронирований, занявших ночи номера в интервале, по возрастанию заезда."""
+    return list(
+        RoomNight.objects.filter(room_id=room_id, night__gte=check_in_date, night__lt=check_out_date)
+        .values_list('booking__check_in_date', 'booking__check_out_date')
+        .order_by('booking__check_in_date')
+        .distinct()
+    )
+
+
+def claim_nights(booking):
+    """Занимает ночи сохранённого бронирования; NightsUnavailable, если хотя бы одна занята."""
+    try:
+        # Savepoint: после IntegrityError внешняя транзакция остаётся рабочей
+        with transaction.atomic():
+            RoomNight.objects.bulk_create(_night_rows(booking))
+    except IntegrityError:
+        raise NightsUnavailable(
+            conflicting_intervals(booking.room_id, booking.check_in_date, booking.check_out_date)
+        )
+    occupancy.nights_changed(booking.room_id, booking.check_in_date, booking.check_out_date)
+
+
+def claim_nights_bulk(bookings):
+    """Занимает ночи пачки бронирований. Возвращает список тех, чьи ночи уже заняты.
+
+    Обычно это один INSERT; при конфликте пачка повторяется поштучно, чтобы найти проигравших.
+    """
+    try:
+        with transaction.atomic():
+            RoomNight.objects.bulk_create([row for booking in bookings for row in _night_rows(booking)])
+    except IntegrityError:
+        pass
+    else:
+        for booking in bookings:
+            occupancy.nights_changed(booking.room_id, booking.check_in_date, booking.check_out_date)
+        return []
+    failed = []
+    for booking in bookings:
+        try:
+            claim_nights(booking)
+        except NightsUnavailable:
+            failed.append(booking)
+    return failed
+
+
+def release_nights(booking, room_id=None, check_in_date=None, check_out_date=None):
+    """Освобождает ночи бронирования; прежние номер и даты — для битовой карты после переноса."""
+    if RoomNight.objects.filter(booking=booking).delete()[0]:
+        occupancy.nights_changed(
+            room_id or booking.room_id, check_in_date or booking.check_in_date, check_out_date or booking.check_out_date
+        )
+
+
+# Поля брони, от которых зависят её ночи
+_NIGHT_FIELDS = ('room_id', 'check_in_date', 'check_out_date', 'status')
+
+
+def _nights_state(room_id, check_in_date, check_out_date, status):
+    """(номер, заезд, выезд) для брони, занимающей ночи; None для отменённой."""
+    if status == Booking.STATUS_CANCELLED:
+        return None
+    return room_id, check_in_date, check_out_date
+
+
+@receiver(post_save, sender=Booking)
+def _sync_nights(sender, instance, **kwargs):
+    """Приводит RoomNight в соответствие с бронью; NightsUnavailable, если новые ночи заняты."""
+    stored = getattr(instance, '_stored_state', None)
+    if stored is BOOKING_UNCHANGED:
+        return
+    previous = _nights_state(*(stored[field] for field in _NIGHT_FIELDS)) if stored else None
+    current = _nights_state(*(getattr(instance, field) for field in _NIGHT_FIELDS))
+    if previous == current:
+        return
+    if previous is not None:
+        release_nights(instance, *previous)
+    if current is not None:
+        claim_nights(instance)
@@ -0,0 +1,85 @@
+"""
+Быстрый JSON-кодек для REST API Booking Service.
+
+Использует orjson или msgspec, если они установлены, иначе стандартный json.
+Все бэкенды одинаково кодируют date/datetime (ISO 8601) и Decimal (число),
+поэтому представления отдают значения из .values_list() без ручных преобразований.
+Бэкенд можно выбрать явно через settings.API_JSON_BACKEND (auto/orjson/msgspec/json).
+"""
+import datetime
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.http import HttpResponse
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"Type {type(value).__name__} is not JSON serializable")
+
+
+def _stdlib_backend():
+    def dumps(obj):
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    return "json", dumps, json.loads, (ValueError,)
+
+
+def _orjson_backend():
+    import orjson
+
+    def dumps(obj):
+        return orjson.dumps(obj, default=_default)
+
+    return "orjson", dumps, orjson.loads, (orjson.JSONDecodeError,)
+
+
+def _msgspec_backend():
+    import msgspec
+
+    encoder = msgspec.json.Encoder(enc_hook=_default, decimal_format="number")
+    decoder = msgspec.json.Decoder()
+    return "msgspec", encoder.encode, decoder.decode, (msgspec.DecodeError,)
+
+
+_BACKENDS = {"orjson": _orjson_backend, "msgspec": _msgspec_backend, "json": _stdlib_backend}
+
+
+def _select_backend():
+    requested = getattr(settings, "API_JSON_BACKEND", "auto")
+    if requested != "auto":
+        return _BACKENDS[requested]()
+    for name in ("orjson", "msgspec"):
+        try:
+            return _BACKENDS[name]()
+        except ImportError:
+            continue
+    return _stdlib_backend()
+
+
+BACKEND, _dumps, _loads, _decode_errors = _select_backend()
+
+
+def dumps(obj) -> bytes:
+    """Кодирует объект в JSON (UTF-8 bytes)."""
+    return _dumps(obj)
+
+
+def loads(data):
+    """Декодирует JSON; ValueError при некорректном документе, независимо от бэкенда."""
+    try:
+        return _loads(data)
+    except _decode_errors as e:
+        raise ValueError(str(e)) from e
+
+
+class FastJsonResponse(HttpResponse):
+    """Аналог JsonResponse, кодирующий тело выбранным быстрым бэкендом."""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=dumps(data), **kwargs)
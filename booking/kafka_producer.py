@@ -1,17 +1,130 @@
+"""
+Kafka producer Booking Service.
+
+Параметры (bootstrap, linger, batch size, сжатие, acks, max in-flight) берутся из
+Django settings (KAFKA_*), которые читаются из окружения. Каждое отправленное
+сообщение учитывается в Prometheus: задержка подтверждения брокером, число
+неподтверждённых сообщений и ошибки доставки. Для async-представлений есть
+asend(), который ожидает подтверждение без блокировки event loop.
+"""
+import asyncio
 import json
-from kafka import KafkaProducer
+import logging
+import threading
+import time
+
 from django.conf import settings
+from kafka import KafkaProducer
+from kafka import codec
+
+from .metrics import KAFKA_DELIVERY_ERRORS, KAFKA_DELIVERY_LATENCY, KAFKA_PRODUCER_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+_CODEC_AVAILABLE = {
+    "gzip": codec.has_gzip,
+    "snappy": codec.has_snappy,
+    "lz4": codec.has_lz4,
+    "zstd": codec.has_zstd,
+}
 
 _producer = None
+_producer_lock = threading.Lock()
+
+
+def _compression_type():
+    compression = (settings.KAFKA_PRODUCER_COMPRESSION or "").lower()
+    if compression in ("", "none"):
+        return None
+    if compression not in _CODEC_AVAILABLE:
+        raise ValueError(f"Unsupported KAFKA_PRODUCER_COMPRESSION: {compression}")
+    if not _CODEC_AVAILABLE[compression]():
+        logger.warning("Kafka compression %s requested but its library is not installed; sending uncompressed", compression)
+        return None
+    return compression
+
+
+def _acks():
+    acks = str(settings.KAFKA_PRODUCER_ACKS).lower()
+    return "all" if acks in ("all", "-1") else int(acks)
+
+
+def producer_config() -> dict:
+    """Параметры KafkaProducer из настроек Django."""
+    return {
+        "bootstrap_servers": settings.KAFKA_BOOTSTRAP_SERVERS,
+        "value_serializer": lambda v: json.dumps(v).encode("utf-8"),
+        "linger_ms": settings.KAFKA_PRODUCER_LINGER_MS,
+        "batch_size": settings.KAFKA_PRODUCER_BATCH_SIZE,
+        "compression_type": _compression_type(),
+        "acks": _acks(),
+        "max_in_flight_requests_per_connection": settings.KAFKA_PRODUCER_MAX_IN_FLIGHT,
+    }
+
+
+class InstrumentedProducer:
+    """Обёртка над KafkaProducer, которая снимает метрики доставки каждого сообщения."""
+
+    def __init__(self, producer):
+        self._producer = producer
+
+    def send(self, topic, value, key=None):
+        """Ставит сообщение в буфер producer'а и возвращает future доставки (kafka-python)."""
+        started = time.perf_counter()
+        KAFKA_PRODUCER_QUEUE_DEPTH.inc()
+        try:
+            future = self._producer.send(topic, value=value, key=key)
+        except Exception:
+            KAFKA_PRODUCER_QUEUE_DEPTH.dec()
+            KAFKA_DELIVERY_ERRORS.labels(topic).inc()
+            raise
+
+        def on_success(_metadata):
+            KAFKA_PRODUCER_QUEUE_DEPTH.dec()
+            KAFKA_DELIVERY_LATENCY.labels(topic).observe(time.perf_counter() - started)
+
+        def on_error(exc):
+            KAFKA_PRODUCER_QUEUE_DEPTH.dec()
+            KAFKA_DELIVERY_ERRORS.labels(topic).inc()
+            logger.warning("Kafka delivery to %s failed: %s", topic, exc)
+
+        future.add_callback(on_success)
+        future.add_errback(on_error)
+        return future
+
+    async def asend(self, topic, value, key=None):
+        """Отправка из async-кода: ждёт подтверждения брокера, не блокируя event loop."""
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+
+        def resolve(metadata):
+            if not waiter.done():
+                waiter.set_result(metadata)
+
+        def reject(exc):
+            if not waiter.done():
+                waiter.set_exception(exc)
+
+        future = self.send(topic, value, key=key)
+        # Колбэки kafka-python вызываются из I/O-потока producer'а
+        future.add_callback(lambda metadata: loop.call_soon_threadsafe(resolve, metadata))
+        future.add_errback(lambda exc: loop.call_soon_threadsafe(reject, exc))
+        return await waiter
+
+    def flush(self, timeout=None):
+        self._producer.flush(timeout=timeout)
+
+    def close(self, timeout=None):
+        self._producer.close(timeout=timeout)
 
 
-def get_producer():
+def get_producer() -> InstrumentedProducer:
+    """Общий для процесса producer (создаётся при первом обращении)."""
     global _producer
 
     if _producer is None:
-        _producer = KafkaProducer(
-            bootstrap_servers="kafka:9092",
-            value_serializer=lambda v: json.dumps(v).encode("utf-8"),
-        )
+        with _producer_lock:
+            if _producer is None:
+                _producer = InstrumentedProducer(KafkaProducer(**producer_config()))
 
-    return _producer
\ No newline at end of file
+    return _producer
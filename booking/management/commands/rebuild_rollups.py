@@ -0,0 +1,31 @@
+"""
+Пересчёт суточных сводок отелей (HotelDailyStats) по бронированиям.
+Запуск: python manage.py rebuild_rollups --from 2025-01-01 --to 2026-01-01 [--hotel ID ...]
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from booking.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает сводки занятости и выручки отелей за диапазон дат [from, to)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="start", required=True, help="Первая дата (YYYY-MM-DD)")
+        parser.add_argument("--to", dest="end", required=True, help="Дата после последней (YYYY-MM-DD)")
+        parser.add_argument("--hotel", type=int, action="append", dest="hotels", help="Только указанные отели")
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options["start"])
+            end = date.fromisoformat(options["end"])
+        except ValueError:
+            raise CommandError("Даты должны быть в формате YYYY-MM-DD")
+        if start >= end:
+            raise CommandError("--to должна быть позже --from")
+        with transaction.atomic():
+            rows = rebuild(start, end, options["hotels"])
+        self.stdout.write(self.style.SUCCESS(f"Записано строк сводки: {rows}"))
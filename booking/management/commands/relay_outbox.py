@@ -0,0 +1,40 @@
+"""
+Relay transactional outbox → Kafka.
+Запуск: python manage.py relay_outbox [--once] [--batch-size N] [--interval SEC]
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from booking.outbox import relay_batch
+
+
+class Command(BaseCommand):
+    help = "Отправляет неотправленные события OutboxEvent в Kafka пачками"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_RELAY_BATCH_SIZE)
+        parser.add_argument(
+            "--interval", type=float, default=settings.OUTBOX_RELAY_INTERVAL,
+            help="Пауза между опросами пустой очереди, секунд",
+        )
+        parser.add_argument("--once", action="store_true", help="Отправить очередь один раз и выйти")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        total_sent = 0
+        try:
+            while True:
+                sent, failed = relay_batch(batch_size=batch_size)
+                total_sent += sent
+                if failed:
+                    self.stderr.write(f"Не удалось отправить {failed} событий, повтор через {options['interval']} с")
+                if options["once"] and (failed or sent < batch_size):
+                    break
+                # Полная пачка — очередь, вероятно, не пуста: продолжаем без паузы
+                if failed or sent < batch_size:
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Отправлено событий: {total_sent}"))
@@ -1,6 +1,26 @@
-from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+import os
+import threading
+from pathlib import Path
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+from django.conf import settings
 from django.http import HttpResponse
 
+# Режим нескольких процессов (воркеры uvicorn/gunicorn, relay_outbox): если задан
+# PROMETHEUS_MULTIPROC_DIR, prometheus_client пишет значения в mmap-файлы каталога,
+# а /metrics суммирует файлы всех процессов. Без переменной — обычный реестр процесса.
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+if MULTIPROC_DIR:
+    # Файлы метрик без меток создаются уже при объявлении метрик ниже
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+# Метка path для запросов, не сопоставленных ни с одним маршрутом (404 до views)
+UNMATCHED_PATH = "unmatched"
+# Метка path, в которую сводятся маршруты сверх METRICS_MAX_PATH_LABELS
+OVERFLOW_PATH = "other"
+
 REQUEST_COUNT = Counter(
     "booking_http_requests_total",
     "Total HTTP requests for booking service",
@@ -13,6 +33,128 @@ REQUEST_LATENCY = Histogram(
     ["method", "path"],
 )
 
+AVAILABILITY_INDEX_HITS = Counter(
+    "booking_availability_index_hits_total",
+    "Availability checks answered from the in-memory room index",
+)
+
+AVAILABILITY_INDEX_MISSES = Counter(
+    "booking_availability_index_misses_total",
+    "Availability checks that had to load the room from the database",
+)
+
+AVAILABILITY_INDEX_REBUILDS = Counter(
+    "booking_availability_index_rebuilds_total",
+    "Room entries rebuilt in the availability index",
+)
+
+OUTBOX_EVENTS_RELAYED = Counter(
+    "booking_outbox_events_relayed_total",
+    "Outbox events processed by the Kafka relay",
+    ["result"],
+)
+
+REQUEST_DB_QUERIES = Histogram(
+    "booking_http_request_db_queries",
+    "SQL statements executed per HTTP request",
+    ["method", "path"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233),
+)
+
+REQUEST_DB_TIME = Histogram(
+    "booking_http_request_db_seconds",
+    "Total time spent in SQL statements per HTTP request",
+    ["method", "path"],
+)
+
+KAFKA_DELIVERY_LATENCY = Histogram(
+    "booking_kafka_delivery_seconds",
+    "Time from producer.send to broker acknowledgement",
+    ["topic"],
+)
+
+KAFKA_PRODUCER_QUEUE_DEPTH = Gauge(
+    "booking_kafka_producer_queue_depth",
+    "Messages handed to the Kafka producer and not yet acknowledged",
+    # В режиме нескольких процессов — сумма по живым процессам
+    multiprocess_mode="livesum",
+)
+
+KAFKA_DELIVERY_ERRORS = Counter(
+    "booking_kafka_delivery_errors_total",
+    "Kafka messages that failed to be delivered",
+    ["topic"],
+)
+
+
+class BoundedLabelValues:
+    """Пропускает не больше limit различных значений метки; остальные сводятся в overflow."""
+
+    def __init__(self, limit, overflow=OVERFLOW_PATH):
+        self.limit = limit
+        self.overflow = overflow
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, value):
+        if value in self._seen:
+            return value
+        with self._lock:
+            if value not in self._seen:
+                if len(self._seen) >= self.limit:
+                    return self.overflow
+                self._seen.add(value)
+        return value
+
+
+path_label = BoundedLabelValues(getattr(settings, "METRICS_MAX_PATH_LABELS", 200))
+
+
+def route_label(request) -> str:
+    """Шаблон маршрута вместо сырого пути: /api/bookings/<int:booking_id>/, а не /api/bookings/12345/."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNMATCHED_PATH
+    return path_label("/" + match.route)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def cleanup_stale_files(directory=None):
+    """Убирает live-gauge файлы завершившихся процессов (прошлый запуск, упавшие воркеры). Возвращает число pid.
+
+    Счётчики и гистограммы завершившихся процессов остаются в сумме, иначе значения
+    пошли бы вниз; каталог целиком очищается при старте развёртывания (docker-compose).
+    """
+    directory = directory or MULTIPROC_DIR
+    if not directory:
+        return 0
+    dead = set()
+    for path in Path(directory).glob("gauge_live*_*.db"):
+        pid = path.stem.rsplit("_", 1)[-1]
+        if pid.isdigit() and not _pid_alive(int(pid)):
+            dead.add(int(pid))
+    for pid in dead:
+        multiprocess.mark_process_dead(pid, directory)
+    return len(dead)
+
+
+def _registry():
+    if not MULTIPROC_DIR:
+        return REGISTRY
+    # Новый реестр на каждый сбор, как рекомендует prometheus_client
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
 
 def metrics_response() -> HttpResponse:
-    return HttpResponse(generate_latest(), content_type=CONTENT_TYPE_LATEST)
+    return HttpResponse(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
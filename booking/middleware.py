@@ -1,17 +1,85 @@
+import logging
 import time
 
-from booking.metrics import REQUEST_COUNT, REQUEST_LATENCY
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from booking.db_profile import track_queries
+from booking.metrics import REQUEST_COUNT, REQUEST_DB_QUERIES, REQUEST_DB_TIME, REQUEST_LATENCY, route_label
+
+logger = logging.getLogger(__name__)
 
 
 class PrometheusMetricsMiddleware:
+    # Поддерживает оба режима, чтобы под ASGI async-представления не переключались в поток
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         start = time.perf_counter()
         response = self.get_response(request)
-        duration = time.perf_counter() - start
-        path = request.path
+        self._observe(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._observe(request, response, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def _observe(request, response, duration):
+        # Метка — шаблон маршрута: число временных рядов не растёт с числом id
+        path = route_label(request)
         REQUEST_COUNT.labels(request.method, path, str(response.status_code)).inc()
         REQUEST_LATENCY.labels(request.method, path).observe(duration)
+
+
+class QueryMetricsMiddleware:
+    """Число SQL-запросов и время в БД на запрос: гистограммы по маршруту, Server-Timing, журнал превышений.
+
+    Запросы, выполненные при итерации StreamingHttpResponse (выгрузки), уже после
+    возврата из представления, не учитываются.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with track_queries() as stats:
+            response = self.get_response(request)
+        self._observe(request, response, stats)
         return response
+
+    async def __acall__(self, request):
+        with track_queries() as stats:
+            response = await self.get_response(request)
+        self._observe(request, response, stats)
+        return response
+
+    @staticmethod
+    def _observe(request, response, stats):
+        path = route_label(request)
+        REQUEST_DB_QUERIES.labels(request.method, path).observe(stats.count)
+        REQUEST_DB_TIME.labels(request.method, path).observe(stats.duration)
+        if settings.SERVER_TIMING_HEADER:
+            response["Server-Timing"] = f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"'
+        if stats.count > settings.QUERY_BUDGET_PER_REQUEST:
+            logger.warning(
+                "Query budget exceeded: %s %s (%s) made %d queries in %.1f ms, budget %d",
+                request.method, request.path, path, stats.count, stats.duration * 1000, settings.QUERY_BUDGET_PER_REQUEST,
+            )
@@ -0,0 +1,59 @@
+"""
+Полнотекстовые индексы FTS5 для поиска гостей и номеров (только SQLite).
+
+Таблицы с внешним содержимым (content=...) синхронизируются триггерами, поэтому
+индекс остаётся актуальным и при bulk_create/update(), которые не шлют сигналы.
+На других СУБД миграция ничего не делает — поиск использует LIKE-бэкенд.
+"""
+from django.db import migrations
+
+FTS_TABLES = {
+    'booking_guest_fts': ('booking_guest', 'guest_id', ['first_name', 'last_name', 'middle_name', 'phone', 'email']),
+    'booking_room_fts': ('booking_room', 'room_id', ['number', 'name']),
+}
+
+
+def _create_sql(fts_table, table, pk, columns):
+    cols = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    delete_old = (
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.{pk}, {old_values});"
+    )
+    insert_new = f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.{pk}, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE {fts_table} USING fts5({cols}, content='{table}', content_rowid='{pk}', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER {fts_table}_ad AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER {fts_table}_au AFTER UPDATE ON {table} BEGIN {delete_old} {insert_new} END",
+        f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')",
+    ]
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for fts_table, (table, pk, columns) in FTS_TABLES.items():
+        for statement in _create_sql(fts_table, table, pk, columns):
+            schema_editor.execute(statement)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for fts_table in FTS_TABLES:
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {fts_table}_{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {fts_table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0006_outboxevent'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
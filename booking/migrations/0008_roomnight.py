@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:54
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_nights(apps, schema_editor):
+    """Занимаем ночи существующих неотменённых бронирований (при пересечениях — первой по id)."""
+    Booking = apps.get_model('booking', 'Booking')
+    RoomNight = apps.get_model('booking', 'RoomNight')
+    nights = []
+    bookings = (
+        Booking.objects.exclude(status='CANCELLED')
+        .order_by('booking_id')
+        .values_list('booking_id', 'room_id', 'check_in_date', 'check_out_date')
+    )
+    for booking_id, room_id, check_in_date, check_out_date in bookings.iterator(chunk_size=2000):
+        for offset in range((check_out_date - check_in_date).days):
+            nights.append(RoomNight(room_id=room_id, booking_id=booking_id, night=check_in_date + timedelta(days=offset)))
+        if len(nights) >= 5000:
+            RoomNight.objects.bulk_create(nights, ignore_conflicts=True)
+            nights = []
+    RoomNight.objects.bulk_create(nights, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0007_search_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomNight',
+            fields=[
+                ('room_night_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('night', models.DateField(verbose_name='Ночь')),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='booking.booking', verbose_name='Бронирование')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='booking.room', verbose_name='Номер')),
+            ],
+            options={
+                'verbose_name': 'Занятая ночь',
+                'verbose_name_plural': 'Занятые ночи',
+                'constraints': [models.UniqueConstraint(fields=('room', 'night'), name='roomnight_room_night_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_nights, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:57
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_stats(apps, schema_editor):
+    """Начальные сводки по существующим неотменённым бронированиям (дальше — rebuild_rollups)."""
+    Booking = apps.get_model('booking', 'Booking')
+    HotelDailyStats = apps.get_model('booking', 'HotelDailyStats')
+    totals = defaultdict(lambda: [0, Decimal(0), Decimal(0)])
+    bookings = (
+        Booking.objects.exclude(status='CANCELLED').filter(room__hotel__isnull=False)
+        .values_list('room__hotel_id', 'check_in_date', 'check_out_date', 'total_price', 'status')
+    )
+    for hotel_id, check_in_date, check_out_date, total_price, status in bookings.iterator(chunk_size=2000):
+        nights = (check_out_date - check_in_date).days
+        if nights <= 0:
+            continue
+        nightly = (Decimal(total_price) / nights).quantize(Decimal('0.01'))
+        for offset in range(nights):
+            total = totals[(hotel_id, check_in_date + timedelta(days=offset))]
+            total[0] += 1
+            total[1] += nightly
+            total[2] += nightly if status == 'PAID' else 0
+    HotelDailyStats.objects.bulk_create(
+        [
+            HotelDailyStats(hotel_id=hotel_id, date=day, rooms_sold=sold, revenue=revenue, paid_revenue=paid)
+            for (hotel_id, day), (sold, revenue, paid) in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0008_roomnight'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotelDailyStats',
+            fields=[
+                ('hotel_daily_stats_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('rooms_sold', models.IntegerField(default=0, verbose_name='Продано номеро-ночей')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка')),
+                ('paid_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Оплаченная выручка')),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='booking.hotel', verbose_name='Отель')),
+            ],
+            options={
+                'verbose_name': 'Сводка отеля за день',
+                'verbose_name_plural': 'Сводки отелей по дням',
+                'constraints': [models.UniqueConstraint(fields=('hotel', 'date'), name='hoteldailystats_hotel_date_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
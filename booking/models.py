@@ -2,7 +2,7 @@ from django.db import models
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 
 
@@ -162,6 +162,16 @@ class Booking(models.Model):
         verbose_name = "Бронирование"
         verbose_name_plural = "Бронирования"
         ordering = ['-check_in_date']
+        indexes = [
+            # Проверка пересечений дат по номеру
+            models.Index(fields=['room', 'check_in_date', 'check_out_date'], name='booking_room_dates_idx'),
+            # API: фильтр по статусу + сортировка по дате создания
+            models.Index(fields=['status', 'created_at'], name='booking_status_created_idx'),
+            # API: keyset-пагинация по (created_at, booking_id)
+            models.Index(fields=['created_at', 'booking_id'], name='booking_created_id_idx'),
+            # Профиль и список бронирований пользователя
+            models.Index(fields=['user', 'check_in_date'], name='booking_user_checkin_idx'),
+        ]
 
     def __str__(self):
         return f"Бронирование #{self.booking_id} - {self.guest} в {self.room}"
@@ -184,3 +194,84 @@ class Booking(models.Model):
         if self.room and self.check_in_date and self.check_out_date:
             self.total_price = self.room.calculate_price(self.check_in_date, self.check_out_date)
         super().save(*args, **kwargs)
+
+
+# Поля брони, прежние значения которых нужны сигналам ночей (inventory) и сводок (rollups)
+BOOKING_STORED_FIELDS = ('room_id', 'room__hotel_id', 'check_in_date', 'check_out_date', 'total_price', 'status')
+BOOKING_UNCHANGED = object()
+
+
+@receiver(pre_save, sender=Booking)
+def remember_stored_booking(sender, instance, update_fields=None, **kwargs):
+    """Прежнее состояние брони — один запрос на save() для всех сигналов Booking.
+
+    None — брони ещё нет в базе; BOOKING_UNCHANGED — update_fields не задевают отслеживаемые поля.
+    """
+    if instance.pk is None:
+        instance._stored_state = None
+    elif update_fields is not None and not {'room', *BOOKING_STORED_FIELDS} & set(update_fields):
+        instance._stored_state = BOOKING_UNCHANGED
+    else:
+        instance._stored_state = Booking.objects.filter(pk=instance.pk).values(*BOOKING_STORED_FIELDS).first()
+
+
+class RoomNight(models.Model):
+    """Занятая ночь номера; уникальность (room, night) исключает двойное бронирование"""
+    room_night_id = models.BigAutoField(primary_key=True)
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='nights', verbose_name="Номер")
+    night = models.DateField(verbose_name="Ночь")
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='nights', verbose_name="Бронирование")
+
+    class Meta:
+        verbose_name = "Занятая ночь"
+        verbose_name_plural = "Занятые ночи"
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'night'], name='roomnight_room_night_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.room} — {self.night}"
+
+
+class HotelDailyStats(models.Model):
+    """Суточная сводка отеля: проданные номеро-ночи и выручка (поддерживается инкрементально)"""
+    hotel_daily_stats_id = models.BigAutoField(primary_key=True)
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='daily_stats', verbose_name="Отель")
+    date = models.DateField(verbose_name="Дата")
+    rooms_sold = models.IntegerField(default=0, verbose_name="Продано номеро-ночей")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Выручка")
+    paid_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Оплаченная выручка")
+
+    class Meta:
+        verbose_name = "Сводка отеля за день"
+        verbose_name_plural = "Сводки отелей по дням"
+        constraints = [
+            models.UniqueConstraint(fields=['hotel', 'date'], name='hoteldailystats_hotel_date_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.hotel} — {self.date}"
+
+
+class OutboxEvent(models.Model):
+    """Событие для Kafka, записанное в одной транзакции с бронированием (transactional outbox)"""
+    event_id = models.BigAutoField(primary_key=True)
+    topic = models.CharField(max_length=200, verbose_name="Топик")
+    payload = models.JSONField(verbose_name="Данные события")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Попыток отправки")
+    last_error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Дата отправки")
+    claimed_until = models.DateTimeField(null=True, blank=True, verbose_name="Захвачено relay до")
+
+    class Meta:
+        verbose_name = "Событие outbox"
+        verbose_name_plural = "События outbox"
+        ordering = ['event_id']
+        indexes = [
+            # Очередь неотправленных событий для relay
+            models.Index(fields=['event_id'], condition=models.Q(sent_at__isnull=True), name='outbox_unsent_idx'),
+        ]
+
+    def __str__(self):
+        return f"Событие #{self.event_id} ({self.topic})"
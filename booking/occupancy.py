@@ -0,0 +1,263 @@
+"""
+Битовая карта занятости номеров отеля для календаря (GET /api/hotels/<id>/calendar/).
+
+Для каждого отеля в OCCUPANCY_BITMAP_DIR лежит файл hotel_<id>.bin: заголовок
+(JSON: номера, первая дата, число дней) и по строке бит на номер — бит ночи
+установлен, если она занята в RoomNight. Процессы отображают файл в память
+(mmap, только чтение), поэтому календарь любого размера — срез одного mmap
+без запросов к БД.
+
+Изменения ночей номера (занятие, освобождение, удаление брони) после коммита
+перечитывают из БД только затронутый диапазон строки и дописывают байты на
+месте под flock. Добавление/удаление номеров (перенос номера в другой отель —
+для обоих отелей) и смена формата ведут к полной пересборке файла (атомарная
+замена через os.replace), как и истечение OCCUPANCY_BITMAP_MAX_AGE — так
+горизонт календаря сдвигается вместе с датой.
+"""
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Booking, Hotel, Room, RoomNight
+
+MAGIC = b'OCC1'
+# MAGIC + длина JSON-заголовка; строки бит начинаются с границы 8 байт
+_PREFIX = struct.Struct('<4sI')
+
+
+def _bits_to_string(bits, days):
+    """Младший бит — первый день: 0b0110, 4 → '0110' по дням."""
+    return format(bits, f'0{days}b')[::-1] if days else ''
+
+
+class OccupancyBitmap:
+    """Открытый на чтение файл отеля."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_size = _PREFIX.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{path}: not an occupancy bitmap')
+        header = json.loads(self.map[_PREFIX.size:_PREFIX.size + header_size])
+        self.start = date.fromisoformat(header['start'])
+        self.days = header['days']
+        self.built_at = header['built_at']
+        self.rooms = [tuple(room) for room in header['rooms']]
+        self.row_bytes = (self.days + 7) // 8
+        self.data_offset = header['data_offset']
+
+    def covers(self, start, days):
+        return self.start <= start and start + timedelta(days=days) <= self.start + timedelta(days=self.days)
+
+    def row(self, index, start, days):
+        """Строка '0'/'1' по дням [start, start + days) для номера с позицией index."""
+        first = (start - self.start).days
+        offset = self.data_offset + index * self.row_bytes + first // 8
+        chunk = self.map[offset:offset + (first % 8 + days + 7) // 8]
+        return _bits_to_string((int.from_bytes(chunk, 'little') >> (first % 8)) & ((1 << days) - 1), days)
+
+    def close(self):
+        self.map.close()
+
+
+def _bitmap_dir():
+    return Path(settings.OCCUPANCY_BITMAP_DIR)
+
+
+def _path(hotel_id):
+    return _bitmap_dir() / f'hotel_{hotel_id}.bin'
+
+
+@contextmanager
+def _locked(hotel_id):
+    """Межпроцессная блокировка записи в файл отеля."""
+    _bitmap_dir().mkdir(parents=True, exist_ok=True)
+    with open(_bitmap_dir() / f'hotel_{hotel_id}.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _occupied_rows(room_ids, start, days):
+    """{room_id: bytearray бит} по RoomNight в [start, start + days) — один запрос."""
+    row_bytes = (days + 7) // 8
+    rows = {room_id: bytearray(row_bytes) for room_id in room_ids}
+    nights = RoomNight.objects.filter(
+        room_id__in=room_ids, night__gte=start, night__lt=start + timedelta(days=days)
+    ).values_list('room_id', 'night')
+    for room_id, night in nights:
+        position = (night - start).days
+        rows[room_id][position // 8] |= 1 << (position % 8)
+    return rows
+
+
+def rebuild(hotel_id):
+    """Полностью пересобирает файл отеля. Hotel.DoesNotExist, если отеля нет."""
+    if not Hotel.objects.filter(pk=hotel_id).exists():
+        raise Hotel.DoesNotExist(hotel_id)
+    start = timezone.now().date() - timedelta(days=settings.OCCUPANCY_BITMAP_PAST_DAYS)
+    days = settings.OCCUPANCY_BITMAP_DAYS
+    path = _path(hotel_id)
+    # Снимок читается под блокировкой: иначе _refresh, успевший между чтением и
+    # os.replace, был бы затёрт устаревшими данными
+    with _locked(hotel_id):
+        rooms = list(
+            Room.objects.filter(hotel_id=hotel_id).order_by('number', 'room_id').values_list('room_id', 'number')
+        )
+        rows = _occupied_rows([room_id for room_id, _ in rooms], start, days)
+
+        header = {'start': start.isoformat(), 'days': days, 'built_at': time.time(), 'rooms': rooms, 'data_offset': 0}
+        # data_offset зависит от длины заголовка, в котором он сам записан: берём с запасом и выравниваем
+        size = len(json.dumps(header).encode()) + 32
+        header['data_offset'] = (_PREFIX.size + size + 7) // 8 * 8
+        header_bytes = json.dumps(header).encode().ljust(size)
+
+        tmp_path = path.with_suffix(f'.tmp{os.getpid()}')
+        with open(tmp_path, 'wb') as f:
+            f.write(_PREFIX.pack(MAGIC, len(header_bytes)))
+            f.write(header_bytes)
+            f.write(b'\0' * (header['data_offset'] - _PREFIX.size - len(header_bytes)))
+            for room_id, _ in rooms:
+                f.write(rows[room_id])
+            # Пустой файл без номеров mmap не отобразит
+            f.write(b'\0' * 8)
+        os.replace(tmp_path, path)
+
+
+class _OpenBitmaps:
+    """Кэш открытых файлов процесса; файл переоткрывается, если его заменили (новый inode)."""
+
+    def __init__(self):
+        self._bitmaps = {}
+        self._lock = threading.Lock()
+
+    def get(self, hotel_id):
+        path = _path(hotel_id)
+        with self._lock:
+            bitmap = self._bitmaps.get(hotel_id)
+            try:
+                inode = os.stat(path).st_ino
+            except FileNotFoundError:
+                inode = None
+            if bitmap is not None and bitmap.inode == inode:
+                return bitmap
+            if bitmap is not None:
+                bitmap.close()
+                del self._bitmaps[hotel_id]
+            if inode is None:
+                return None
+            bitmap = self._bitmaps[hotel_id] = OccupancyBitmap(path)
+            return bitmap
+
+    def clear(self):
+        with self._lock:
+            for bitmap in self._bitmaps.values():
+                bitmap.close()
+            self._bitmaps.clear()
+
+
+open_bitmaps = _OpenBitmaps()
+
+
+def get_bitmap(hotel_id):
+    """Актуальный файл отеля (при отсутствии или устаревании пересобирается)."""
+    bitmap = open_bitmaps.get(hotel_id)
+    if bitmap is None or time.time() - bitmap.built_at > settings.OCCUPANCY_BITMAP_MAX_AGE:
+        rebuild(hotel_id)
+        bitmap = open_bitmaps.get(hotel_id)
+    return bitmap
+
+
+def calendar(hotel_id, start, days):
+    """[(room_id, number, '0101...')] по номерам отеля; Hotel.DoesNotExist, если отеля нет."""
+    bitmap = get_bitmap(hotel_id)
+    if bitmap.covers(start, days):
+        return [(room_id, number, bitmap.row(index, start, days)) for index, (room_id, number) in enumerate(bitmap.rooms)]
+    # Вне горизонта файла (прошлое или далёкое будущее) — напрямую из RoomNight
+    rows = _occupied_rows([room_id for room_id, _ in bitmap.rooms], start, days)
+    return [
+        (room_id, number, _bits_to_string(int.from_bytes(rows[room_id], 'little'), days))
+        for room_id, number in bitmap.rooms
+    ]
+
+
+def _refresh(room_id, check_in_date, check_out_date):
+    """Перечитывает из БД ночи номера в [check_in_date, check_out_date) и обновляет байты файла на месте."""
+    hotel_id = Room.objects.filter(pk=room_id).values_list('hotel_id', flat=True).first()
+    if hotel_id is None or not _path(hotel_id).exists():
+        return
+    with _locked(hotel_id):
+        bitmap = OccupancyBitmap(_path(hotel_id))
+        try:
+            index = next((i for i, (rid, _) in enumerate(bitmap.rooms) if rid == room_id), None)
+            first = max((check_in_date - bitmap.start).days, 0)
+            last = min((check_out_date - bitmap.start).days, bitmap.days)
+            if index is None or first >= last:
+                return
+            # Обновляем целые байты, покрывающие диапазон, — границы перечитываются из БД вместе с ним
+            byte_start, byte_end = first // 8, (last + 7) // 8
+            span_start = bitmap.start + timedelta(days=byte_start * 8)
+            span_days = min((byte_end - byte_start) * 8, bitmap.days - byte_start * 8)
+            row = _occupied_rows([room_id], span_start, span_days)[room_id]
+            offset = bitmap.data_offset + index * bitmap.row_bytes + byte_start
+        finally:
+            bitmap.close()
+        with open(_path(hotel_id), 'r+b') as f:
+            os.pwrite(f.fileno(), bytes(row), offset)
+
+
+def nights_changed(room_id, check_in_date, check_out_date):
+    """Обновляет битовую карту после коммита текущей транзакции."""
+    transaction.on_commit(lambda: _refresh(room_id, check_in_date, check_out_date))
+
+
+def drop(hotel_id):
+    """Удаляет файл отеля; он пересоберётся при следующем запросе календаря."""
+    if hotel_id is None:
+        return
+    with _locked(hotel_id):
+        _path(hotel_id).unlink(missing_ok=True)
+
+
+@receiver(post_delete, sender=Booking)
+def _booking_deleted(sender, instance, **kwargs):
+    nights_changed(instance.room_id, instance.check_in_date, instance.check_out_date)
+
+
+@receiver(pre_save, sender=Room)
+def _remember_room_hotel(sender, instance, update_fields=None, **kwargs):
+    # Номер, перенесённый в другой отель, пропадает и из карты прежнего отеля
+    if instance.pk is None or (update_fields is not None and not {'hotel', 'hotel_id'} & set(update_fields)):
+        instance._stored_hotel_id = None
+    else:
+        instance._stored_hotel_id = Room.objects.filter(pk=instance.pk).values_list('hotel_id', flat=True).first()
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def _room_changed(sender, instance, **kwargs):
+    # Состав и номера комнат хранятся в заголовке — пересобираем файл целиком
+    hotel_ids = {instance.hotel_id, getattr(instance, '_stored_hotel_id', None)}
+
+    def drop_hotels():
+        for hotel_id in hotel_ids:
+            drop(hotel_id)
+
+    transaction.on_commit(drop_hotels)
@@ -0,0 +1,84 @@
+"""
+Transactional outbox для событий оплаты.
+
+Событие пишется в таблицу OutboxEvent в той же транзакции, что и бронирование,
+поэтому HTTP-запрос не обращается к брокеру. Relay (manage.py relay_outbox)
+пакетами вычитывает неотправленные события, отправляет их в Kafka с одним flush
+и помечает отправленными; неудачные остаются в очереди и повторяются.
+Транзакции короткие: пачка захватывается (claimed_until) в одной, итог записывается
+в другой, а обращение к брокеру идёт вне транзакции — медленный брокер не держит
+блокировку записи и не останавливает создание бронирований.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .kafka_producer import get_producer
+from .metrics import OUTBOX_EVENTS_RELAYED
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+
+def payment_event(booking):
+    """Несохранённое событие оплаты бронирования для топика KAFKA_PAYMENT_TOPIC."""
+    return OutboxEvent(
+        topic=settings.KAFKA_PAYMENT_TOPIC,
+        payload={
+            "booking_id": booking.booking_id,
+            "amount": float(booking.total_price),
+            "guest_id": booking.guest_id,
+        },
+    )
+
+
+def relay_batch(batch_size=None, producer=None):
+    """Отправляет одну пачку неотправленных событий. Возвращает (отправлено, ошибок)."""
+    batch_size = batch_size or settings.OUTBOX_RELAY_BATCH_SIZE
+    now = timezone.now()
+    with transaction.atomic():
+        # skip_locked позволяет запускать несколько relay параллельно (на SQLite игнорируется);
+        # захват на OUTBOX_RELAY_CLAIM_SECONDS — пачку не возьмёт другой relay, пока идёт отправка
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(sent_at__isnull=True)
+            .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lt=now))
+            .order_by("event_id")[:batch_size]
+        )
+        if not events:
+            return 0, 0
+        OutboxEvent.objects.filter(event_id__in=[event.event_id for event in events]).update(
+            claimed_until=now + timedelta(seconds=settings.OUTBOX_RELAY_CLAIM_SECONDS)
+        )
+
+    errors = {}
+    try:
+        producer = producer or get_producer()
+        futures = [(event, producer.send(event.topic, value=event.payload)) for event in events]
+        producer.flush()
+        for event, future in futures:
+            if future.failed():
+                errors[event.event_id] = str(future.exception)
+    except Exception as e:
+        logger.exception("Outbox relay: Kafka send failed: %s", e)
+        errors = {event.event_id: str(e) for event in events}
+
+    sent_ids = [event.event_id for event in events if event.event_id not in errors]
+    failed_by_error = {}
+    for event_id, error in errors.items():
+        failed_by_error.setdefault(error, []).append(event_id)
+    with transaction.atomic():
+        if sent_ids:
+            OutboxEvent.objects.filter(event_id__in=sent_ids).update(sent_at=timezone.now(), claimed_until=None)
+        for error, event_ids in failed_by_error.items():
+            OutboxEvent.objects.filter(event_id__in=event_ids).update(
+                attempts=F("attempts") + 1, last_error=error, claimed_until=None,
+            )
+
+    OUTBOX_EVENTS_RELAYED.labels("sent").inc(len(sent_ids))
+    OUTBOX_EVENTS_RELAYED.labels("failed").inc(len(errors))
+    return len(sent_ids), len(errors)
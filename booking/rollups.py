@@ -0,0 +1,188 @@
+"""
+Суточные сводки отелей (HotelDailyStats) для панели организации и API статистики.
+
+Каждое неотменённое бронирование добавляет в сводку своего отеля по одной
+проданной номеро-ночи и цене ночи на каждую дату проживания (оплаченное — ещё
+и в paid_revenue). Сигналы Booking применяют разницу между прежним и новым
+вкладом в той же транзакции, поэтому чтение сводок не касается Booking.
+Пакетное создание вызывает record_bookings() явно; для исправления расхождений
+(например, после queryset.update()) есть manage.py rebuild_rollups.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import BOOKING_UNCHANGED, Booking, Hotel, HotelDailyStats, Room
+
+_STATE_FIELDS = ('room__hotel_id', 'check_in_date', 'check_out_date', 'total_price', 'status')
+_CENT = Decimal('0.01')
+
+
+def _contribution(state, sign, deltas, start=None, end=None):
+    """Добавляет в deltas вклад бронирования (hotel_id, заезд, выезд, стоимость, статус), опционально в пределах [start, end)."""
+    if state is None:
+        return
+    hotel_id, check_in_date, check_out_date, total_price, status = state
+    nights = (check_out_date - check_in_date).days
+    if hotel_id is None or status == Booking.STATUS_CANCELLED or nights <= 0:
+        return
+    nightly = (Decimal(total_price) / nights).quantize(_CENT)
+    paid = nightly if status == Booking.STATUS_PAID else Decimal(0)
+    first = max(check_in_date, start) if start else check_in_date
+    last = min(check_out_date, end) if end else check_out_date
+    for offset in range((last - first).days):
+        delta = deltas[(hotel_id, first + timedelta(days=offset))]
+        delta[0] += sign
+        delta[1] += sign * nightly
+        delta[2] += sign * paid
+
+
+def _new_deltas():
+    return defaultdict(lambda: [0, Decimal(0), Decimal(0)])
+
+
+def _apply(deltas):
+    """Применяет {(hotel_id, date): [номеро-ночи, выручка, оплачено]} одним UPDATE на группу одинаковых дельт.
+
+    Строки создаются только для прибавлений: вычитать есть из чего лишь в существующей строке, а при
+    каскадном удалении отеля его сводки уже удалены и вставка нарушила бы внешний ключ.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    HotelDailyStats.objects.bulk_create(
+        [
+            HotelDailyStats(hotel_id=hotel_id, date=day)
+            for (hotel_id, day), delta in deltas.items() if any(value > 0 for value in delta)
+        ],
+        ignore_conflicts=True,
+    )
+    groups = defaultdict(list)
+    for (hotel_id, day), delta in deltas.items():
+        groups[(hotel_id, *delta)].append(day)
+    for (hotel_id, sold, revenue, paid), days in groups.items():
+        HotelDailyStats.objects.filter(hotel_id=hotel_id, date__in=days).update(
+            rooms_sold=F('rooms_sold') + sold,
+            revenue=F('revenue') + revenue,
+            paid_revenue=F('paid_revenue') + paid,
+        )
+
+
+def _state(booking):
+    if Booking.room.is_cached(booking):
+        hotel_id = booking.room.hotel_id
+    else:
+        hotel_id = Room.objects.filter(pk=booking.room_id).values_list('hotel_id', flat=True).first()
+    return hotel_id, booking.check_in_date, booking.check_out_date, booking.total_price, booking.status
+
+
+def record_bookings(bookings):
+    """Учитывает новые бронирования, созданные в обход сигналов (bulk_create)."""
+    hotels = dict(Room.objects.filter(pk__in={b.room_id for b in bookings}).values_list('pk', 'hotel_id'))
+    deltas = _new_deltas()
+    for booking in bookings:
+        state = (hotels.get(booking.room_id), booking.check_in_date, booking.check_out_date, booking.total_price, booking.status)
+        _contribution(state, 1, deltas)
+    _apply(deltas)
+
+
+def rebuild(start, end, hotel_ids=None):
+    """Пересчитывает сводки за [start, end) по Booking. Возвращает число записанных строк."""
+    stats = HotelDailyStats.objects.filter(date__gte=start, date__lt=end)
+    bookings = Booking.objects.filter(check_in_date__lt=end, check_out_date__gt=start, room__hotel__isnull=False)
+    if hotel_ids:
+        stats = stats.filter(hotel_id__in=hotel_ids)
+        bookings = bookings.filter(room__hotel_id__in=hotel_ids)
+    deltas = _new_deltas()
+    for state in bookings.exclude(status=Booking.STATUS_CANCELLED).values_list(*_STATE_FIELDS).iterator(chunk_size=2000):
+        _contribution(state, 1, deltas, start, end)
+    stats.delete()
+    HotelDailyStats.objects.bulk_create(
+        [
+            HotelDailyStats(hotel_id=hotel_id, date=day, rooms_sold=sold, revenue=revenue, paid_revenue=paid)
+            for (hotel_id, day), (sold, revenue, paid) in deltas.items()
+        ],
+        batch_size=1000,
+    )
+    return len(deltas)
+
+
+def _metrics(rooms_sold, revenue, paid_revenue, room_count, days):
+    capacity = room_count * days
+    return {
+        'rooms_sold': rooms_sold,
+        'occupancy': round(100 * rooms_sold / capacity, 1) if capacity else 0.0,
+        'adr': (revenue / rooms_sold).quantize(_CENT) if rooms_sold else Decimal(0),
+        'revenue': revenue,
+        'paid_revenue': paid_revenue,
+    }
+
+
+def hotel_stats(hotel_id, start, end, granularity='day'):
+    """Показатели отеля за [start, end) по дням или месяцам: [{'period', 'rooms_sold', 'occupancy', 'adr', ...}]."""
+    room_count = Room.objects.filter(hotel_id=hotel_id).count()
+    stats = HotelDailyStats.objects.filter(hotel_id=hotel_id, date__gte=start, date__lt=end)
+    if granularity == 'month':
+        rows = (
+            stats.annotate(period=TruncMonth('date')).values('period')
+            .annotate(sold=Sum('rooms_sold'), rev=Sum('revenue'), paid=Sum('paid_revenue'))
+            .order_by('period').values_list('period', 'sold', 'rev', 'paid')
+        )
+    else:
+        rows = stats.order_by('date').values_list('date', 'rooms_sold', 'revenue', 'paid_revenue')
+    result = []
+    for period, sold, revenue, paid in rows:
+        if granularity == 'month':
+            next_month = (period.replace(day=28) + timedelta(days=4)).replace(day=1)
+            days = (min(next_month, end) - max(period, start)).days
+        else:
+            days = 1
+        result.append({'period': period, **_metrics(sold, Decimal(revenue), Decimal(paid), room_count, days)})
+    return result
+
+
+def owner_summary(owner, start, end):
+    """Показатели каждого отеля владельца за [start, end): [(hotel, metrics)] — два запроса."""
+    hotels = list(Hotel.objects.filter(owner=owner).annotate(room_count=Count('rooms')).order_by('name'))
+    totals = {
+        hotel_id: (sold, revenue, paid)
+        for hotel_id, sold, revenue, paid in HotelDailyStats.objects.filter(
+            hotel__owner=owner, date__gte=start, date__lt=end
+        ).values('hotel_id').annotate(
+            sold=Sum('rooms_sold'), rev=Sum('revenue'), paid=Sum('paid_revenue')
+        ).values_list('hotel_id', 'sold', 'rev', 'paid')
+    }
+    days = (end - start).days
+    summary = []
+    for hotel in hotels:
+        sold, revenue, paid = totals.get(hotel.pk, (0, 0, 0))
+        summary.append((hotel, _metrics(sold, Decimal(revenue), Decimal(paid), hotel.room_count, days)))
+    return summary
+
+
+@receiver(post_save, sender=Booking)
+def _booking_saved(sender, instance, **kwargs):
+    """Применяем только разницу между прежним вкладом брони (models.remember_stored_booking) и новым."""
+    stored = getattr(instance, '_stored_state', None)
+    if stored is BOOKING_UNCHANGED:
+        return
+    previous = tuple(stored[field] for field in _STATE_FIELDS) if stored else None
+    current = _state(instance)
+    if previous == current:
+        return
+    deltas = _new_deltas()
+    _contribution(previous, -1, deltas)
+    _contribution(current, 1, deltas)
+    _apply(deltas)
+
+
+@receiver(post_delete, sender=Booking)
+def _booking_deleted(sender, instance, **kwargs):
+    deltas = _new_deltas()
+    _contribution(_state(instance), -1, deltas)
+    _apply(deltas)
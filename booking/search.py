@@ -0,0 +1,123 @@
+"""
+Поиск гостей и номеров для списков гостей и бронирований.
+
+Бэкенд возвращает pk найденных записей в порядке релевантности. На SQLite
+используется FTS5 (таблицы и триггеры создаёт миграция 0007_search_fts):
+каждое слово запроса ищется как префикс, порядок — по bm25. На других СУБД
+(или при settings.SEARCH_BACKEND = 'like') — OR из icontains по тем же полям.
+Фильтры списков используют matching() — подзапрос без ограничения числа
+совпадений, поэтому подходящие записи не теряются при любом размере выборки.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, Q, When
+from django.db.models.expressions import RawSQL
+
+from .models import Guest, Room
+
+# Поля, по которым ищутся записи, и FTS5-таблица модели
+SEARCH_FIELDS = {
+    Guest: ('first_name', 'last_name', 'middle_name', 'phone', 'email'),
+    Room: ('number', 'name'),
+}
+FTS_TABLES = {
+    Guest: 'booking_guest_fts',
+    Room: 'booking_room_fts',
+}
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+class LikeSearchBackend:
+    """Переносимый бэкенд: icontains по SEARCH_FIELDS, без ранжирования."""
+
+    name = 'like'
+
+    def matching(self, model, query):
+        condition = Q()
+        for field in SEARCH_FIELDS[model]:
+            condition |= Q(**{f'{field}__icontains': query})
+        return model.objects.filter(condition).values('pk')
+
+    def search(self, model, query, limit=None):
+        pks = self.matching(model, query).values_list('pk', flat=True)
+        return list(pks[:limit] if limit else pks)
+
+
+class Fts5SearchBackend:
+    """SQLite FTS5: префиксный поиск по всем словам запроса, ранжирование по bm25."""
+
+    name = 'fts5'
+
+    @staticmethod
+    def match_expression(query):
+        """'Иван +7 900' → '"Иван"* "7"* "900"*' (все слова как префиксы); '' если слов нет."""
+        return ' '.join(f'"{token}"*' for token in _TOKEN_RE.findall(query))
+
+    def matching(self, model, query):
+        expression = self.match_expression(query)
+        if not expression:
+            return model.objects.none().values('pk')
+        table = FTS_TABLES[model]
+        return RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [expression])
+
+    def search(self, model, query, limit=None):
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        table = FTS_TABLES[model]
+        sql = f'SELECT rowid FROM {table} WHERE {table} MATCH %s ORDER BY rank'
+        params = [expression]
+        if limit:
+            sql += ' LIMIT %s'
+            params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+_BACKENDS = {'like': LikeSearchBackend, 'fts5': Fts5SearchBackend}
+
+
+def get_backend():
+    """Бэкенд из settings.SEARCH_BACKEND (auto: FTS5 на SQLite, иначе LIKE)."""
+    requested = getattr(settings, 'SEARCH_BACKEND', 'auto')
+    if requested == 'auto':
+        requested = 'fts5' if connection.vendor == 'sqlite' else 'like'
+    return _BACKENDS[requested]()
+
+
+def search_ids(model, query, limit=None):
+    """pk записей model, подходящих под query, по убыванию релевантности (все, если limit не задан)."""
+    return get_backend().search(model, query, limit)
+
+
+def matching(model, query):
+    """Подзапрос pk всех записей model, подходящих под query, — для фильтра field__in."""
+    return get_backend().matching(model, query)
+
+
+def ranked(queryset, ids):
+    """queryset, ограниченный ids и упорядоченный так же, как ids."""
+    if not ids:
+        return queryset.none()
+    order = Case(*[When(pk=pk, then=position) for position, pk in enumerate(ids)])
+    return queryset.filter(pk__in=ids).order_by(order)
+
+
+class RankedResults:
+    """Найденные записи для Paginator: len — по списку pk, объекты загружаются только для среза страницы."""
+
+    def __init__(self, queryset, ids):
+        self.queryset = queryset
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return list(ranked(self.queryset, self.ids[key]))
+        return self[key:key + 1][0]
@@ -0,0 +1,267 @@
+"""
+Бюджеты SQL-запросов для каждого представления booking.urls и booking.api_urls.
+
+Набор данных похож на рабочий: несколько отелей организации, номера, гости и
+бронирования разных статусов. Для каждого представления проверяется, что число
+запросов не превышает бюджета и не растёт вместе с числом строк: после запроса
+данные удваиваются (grow) и запрос повторяется — N+1 даёт разницу.
+Кэши (каталог, счётчики) сбрасываются перед каждым измерением — меряется холодный путь.
+"""
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .availability import availability_index
+from .guest_index import guest_index
+from .models import Booking, Guest, Hotel, Room
+from .occupancy import open_bitmaps
+
+START = date(2030, 9, 1)
+
+
+class ViewQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("budget-owner", password="x")
+        cls.owner.profile.user_type = "organization"
+        cls.owner.profile.organization_name = "Сеть отелей"
+        cls.owner.profile.save()
+        cls.user = User.objects.create_user("budget-user", password="x")
+        cls.batch = 0
+        cls.grow_data()
+        cls.room = Room.objects.order_by("pk").first()
+        cls.guest = Guest.objects.order_by("pk").first()
+        cls.booking = Booking.objects.order_by("pk").first()
+
+    @classmethod
+    def grow_data(cls, hotels=2, rooms_per_hotel=4, guests=6):
+        """Добавляет отели, номера, гостей и бронирования в новые номера.
+
+        Бронирования достаются и первому гостю: у представлений одного объекта
+        (карточка гостя, профиль) тоже растёт число связанных строк.
+        """
+        cls.batch += 1
+        batch = cls.batch
+        for h in range(hotels):
+            hotel = Hotel.objects.create(
+                name=f"Отель {batch}-{h}", description="", address="Москва", phone="+7", email="h@example.com",
+                owner=cls.owner,
+            )
+            for r in range(rooms_per_hotel):
+                Room.objects.create(
+                    hotel=hotel, number=f"{batch}{h}{r}", name=f"Номер {r}", description="",
+                    type_name=("Стандарт", "Люкс")[r % 2], price_per_night=1000 + 500 * r,
+                )
+        new_guests = [
+            Guest.objects.create(
+                first_name=f"Гость{g}", last_name=f"Бюджетов{batch}", passport_number=f"QB-{batch}-{g}",
+                phone=f"+7900{batch}{g:04d}", email=f"g{batch}{g}@example.com",
+            )
+            for g in range(guests)
+        ]
+        new_guests += Guest.objects.order_by("pk")[:1]
+        rooms = list(Room.objects.filter(hotel__name__startswith=f"Отель {batch}-"))
+        statuses = (Booking.STATUS_PAYMENT_PENDING, Booking.STATUS_PAID, Booking.STATUS_CANCELLED)
+        for index, guest in enumerate(new_guests):
+            for offset, room in enumerate(rooms[index % 2::2]):
+                check_in = START + timedelta(days=10 * index + 2 * offset + 30 * batch)
+                Booking.objects.create(
+                    room=room, guest=guest, user=(cls.user, cls.owner)[index % 2],
+                    check_in_date=check_in, check_out_date=check_in + timedelta(days=2),
+                    adults_count=2, total_price=room.price_per_night * 2, status=statuses[(index + offset) % 3],
+                )
+        return batch
+
+    def setUp(self):
+        # Битовые карты занятости — в отдельном каталоге: календарь меряется с холодного файла
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(open_bitmaps.clear)
+        settings_override = override_settings(OCCUPANCY_BITMAP_DIR=tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def measure(self, request):
+        cache.clear()
+        availability_index.clear()
+        guest_index.clear()
+        with mock.patch("booking.outbox.get_producer"), CaptureQueriesContext(connection) as queries:
+            response = request()
+        self.assertLess(response.status_code, 400, response)
+        return len(queries)
+
+    def assertQueryBudget(self, budget, request, scales=True):
+        """Не больше budget запросов; при scales число не растёт после добавления данных."""
+        before = self.measure(request)
+        self.assertLessEqual(before, budget, f"{before} запросов при бюджете {budget}")
+        if scales:
+            self.grow_data()
+            after = self.measure(request)
+            self.assertLessEqual(after, before, f"число запросов растёт с данными: {before} → {after}")
+
+    def login(self, user):
+        self.client.force_login(user)
+
+    def test_home(self):
+        self.assertQueryBudget(4, lambda: self.client.get("/"))
+
+    def test_rooms(self):
+        # Холодный кэш: число номеров, страница и два фильтра
+        self.assertQueryBudget(4, lambda: self.client.get("/rooms/"))
+
+    def test_rooms_filtered(self):
+        self.assertQueryBudget(4, lambda: self.client.get("/rooms/", {"type": "Люкс"}))
+
+    def test_room_detail(self):
+        self.assertQueryBudget(3, lambda: self.client.get(f"/rooms/{self.room.pk}/", {"check_in": "2030-09-01", "check_out": "2030-09-03"}))
+
+    def test_room_picker(self):
+        self.assertQueryBudget(1, lambda: self.client.get("/rooms/picker/", {"q": "Номер"}))
+
+    def test_check_availability(self):
+        self.assertQueryBudget(2, lambda: self.client.get(f"/rooms/{self.room.pk}/check-availability/", {"check_in": "2030-09-01", "check_out": "2030-09-03"}))
+
+    def test_guests(self):
+        self.assertQueryBudget(2, lambda: self.client.get("/guests/"))
+
+    def test_guests_search(self):
+        self.assertQueryBudget(3, lambda: self.client.get("/guests/", {"search": "Бюджетов"}))
+
+    def test_guest_detail(self):
+        self.assertQueryBudget(2, lambda: self.client.get(f"/guests/{self.guest.pk}/"))
+
+    def test_guest_create_form(self):
+        self.assertQueryBudget(0, lambda: self.client.get("/guests/create/"))
+
+    def test_bookings_user(self):
+        self.login(self.user)
+        self.assertQueryBudget(5, lambda: self.client.get("/bookings/"))
+
+    def test_bookings_org(self):
+        self.login(self.owner)
+        self.assertQueryBudget(7, lambda: self.client.get("/bookings/", {"search": "Бюджетов"}))
+
+    def test_booking_detail(self):
+        self.assertQueryBudget(1, lambda: self.client.get(f"/bookings/{self.booking.pk}/"))
+
+    def test_booking_create_get(self):
+        self.login(self.user)
+        self.assertQueryBudget(5, lambda: self.client.get("/bookings/create/", {"room": self.room.pk}))
+
+    def test_booking_create_post(self):
+        self.login(self.user)
+        days = iter(range(0, 1000, 3))
+
+        def post():
+            check_in = date(2031, 1, 1) + timedelta(days=next(days))
+            return self.client.post("/bookings/create/", {
+                "room": self.room.pk, "guest_id": self.guest.pk, "check_in_date": check_in.isoformat(),
+                "check_out_date": (check_in + timedelta(days=2)).isoformat(), "adults_count": 1, "children_count": 0,
+            })
+        self.assertQueryBudget(17, post)
+
+    def test_profile(self):
+        self.login(self.user)
+        self.assertQueryBudget(5, lambda: self.client.get("/profile/"))
+
+    def test_organization_panel(self):
+        self.login(self.owner)
+        self.assertQueryBudget(11, lambda: self.client.get("/organization/"))
+
+    def test_hotel_create_form(self):
+        self.login(self.owner)
+        self.assertQueryBudget(3, lambda: self.client.get("/organization/hotels/create/"))
+
+    def test_hotel_edit_form(self):
+        self.login(self.owner)
+        hotel = Hotel.objects.order_by("pk").first()
+        self.assertQueryBudget(6, lambda: self.client.get(f"/organization/hotels/{hotel.pk}/edit/"))
+
+    def test_room_create_form(self):
+        self.login(self.owner)
+        self.assertQueryBudget(4, lambda: self.client.get("/organization/rooms/create/"))
+
+    def test_room_edit_form(self):
+        self.login(self.owner)
+        self.assertQueryBudget(8, lambda: self.client.get(f"/organization/rooms/{self.room.pk}/edit/"))
+
+    def test_export_csv(self):
+        self.login(self.owner)
+        self.assertQueryBudget(4, lambda: self._drain(self.client.get("/organization/bookings/export.csv")))
+
+    def _drain(self, response):
+        b"".join(response.streaming_content)
+        return response
+
+    def test_static_pages(self):
+        for url in ("/contact/", "/register/", "/register/user/", "/register/organization/", "/login/"):
+            self.assertQueryBudget(0, lambda: self.client.get(url), scales=False)
+
+    # API
+
+    def test_api_bookings(self):
+        self.assertQueryBudget(2, lambda: self.client.get("/api/bookings/", {"limit": 50}))
+
+    def test_api_bookings_cursor(self):
+        self.assertQueryBudget(1, lambda: self.client.get("/api/bookings/", {"limit": 5, "status": "PAID", "include_total": "0"}))
+
+    def test_api_booking_create(self):
+        days = iter(range(0, 1000, 3))
+
+        def post():
+            check_in = date(2032, 1, 1) + timedelta(days=next(days))
+            return self.client.post("/api/bookings/", {
+                "roomId": self.room.pk, "guestId": self.guest.pk, "checkInDate": check_in.isoformat(),
+                "checkOutDate": (check_in + timedelta(days=2)).isoformat(),
+            }, content_type="application/json")
+        self.assertQueryBudget(11, post)
+
+    def test_api_batch(self):
+        days = iter(range(0, 1000, 10))
+
+        def post():
+            base = date(2033, 1, 1) + timedelta(days=next(days))
+            rooms = list(Room.objects.values_list("pk", flat=True)[:5])
+            return self.client.post("/api/bookings/batch/", {"items": [
+                {"roomId": room_id, "guestId": self.guest.pk, "checkInDate": base.isoformat(),
+                 "checkOutDate": (base + timedelta(days=2)).isoformat()}
+                for room_id in rooms
+            ]}, content_type="application/json")
+        self.assertQueryBudget(15, post)
+
+    def test_api_booking_detail(self):
+        self.assertQueryBudget(1, lambda: self.client.get(f"/api/bookings/{self.booking.pk}/"))
+
+    def test_api_confirm_payment(self):
+        def confirm():
+            booking = Booking.objects.filter(status=Booking.STATUS_PAYMENT_PENDING).order_by("pk").first()
+            return self.client.post(f"/api/bookings/{booking.pk}/confirm-payment/")
+        self.assertQueryBudget(7, confirm)
+
+    def test_api_cancel(self):
+        def cancel():
+            booking = Booking.objects.exclude(status=Booking.STATUS_CANCELLED).order_by("pk").first()
+            return self.client.post(f"/api/bookings/{booking.pk}/cancel/")
+        self.assertQueryBudget(7, cancel)
+
+    def test_api_availability(self):
+        self.assertQueryBudget(2, lambda: self.client.get("/api/availability/", {"check_in": "2030-09-01", "check_out": "2030-09-05"}))
+
+    def test_api_guest_suggest(self):
+        self.assertQueryBudget(1, lambda: self.client.get("/api/guests/suggest/", {"q": "Бюдж"}))
+
+    def test_api_hotel_calendar(self):
+        self.assertQueryBudget(4, lambda: self.client.get(f"/api/hotels/{self.room.hotel_id}/calendar/", {"from": "2030-09-01", "days": 30}))
+
+    def test_api_hotel_stats(self):
+        self.assertQueryBudget(3, lambda: self.client.get(f"/api/hotels/{self.room.hotel_id}/stats/", {"from": "2030-09-01", "to": "2030-12-01"}))
+
+    def test_api_health_metrics(self):
+        self.assertQueryBudget(0, lambda: self.client.get("/api/health/"), scales=False)
+        self.assertQueryBudget(0, lambda: self.client.get("/api/metrics/"), scales=False)
@@ -0,0 +1,74 @@
+"""
+Регрессионные тесты планов запросов: горячие запросы к Booking не должны
+сваливаться в полный просмотр таблицы (EXPLAIN QUERY PLAN, SQLite).
+"""
+import re
+from datetime import date, datetime, timezone as dt_timezone
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from django.test import TestCase
+
+from .models import Booking, Room
+
+BOOKING_TABLE = Booking._meta.db_table
+# "SCAN booking_booking" без "USING ... INDEX" — полный просмотр таблицы
+FULL_SCAN_RE = re.compile(rf"\bSCAN {BOOKING_TABLE}\b(?!.*\bUSING\b.*\bINDEX\b)")
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN format is SQLite-specific")
+class BookingQueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("planner", password="x")
+        cls.check_in = date(2030, 1, 10)
+        cls.check_out = date(2030, 1, 15)
+
+    def assertNoFullScan(self, queryset):
+        plan = queryset.explain()
+        offending = [line for line in plan.splitlines() if FULL_SCAN_RE.search(line)]
+        self.assertFalse(offending, f"Full table scan of {BOOKING_TABLE}:\n{plan}")
+
+    def test_room_overlap(self):
+        self.assertNoFullScan(
+            Booking.objects.filter(
+                room_id=1, check_in_date__lt=self.check_out, check_out_date__gt=self.check_in
+            ).exclude(status=Booking.STATUS_CANCELLED)
+        )
+
+    def test_availability_index_rebuild(self):
+        self.assertNoFullScan(
+            Booking.objects.filter(room_id=1)
+            .exclude(status=Booking.STATUS_CANCELLED)
+            .order_by("check_in_date")
+            .values_list("check_in_date", "check_out_date")
+        )
+
+    def test_availability_search_anti_join(self):
+        overlapping = Booking.objects.filter(
+            room=OuterRef("pk"), check_in_date__lt=self.check_out, check_out_date__gt=self.check_in
+        ).exclude(status=Booking.STATUS_CANCELLED)
+        self.assertNoFullScan(Room.objects.filter(~Exists(overlapping)).order_by("price_per_night"))
+
+    def test_api_list_by_status(self):
+        self.assertNoFullScan(Booking.objects.filter(status=Booking.STATUS_PAID).order_by("-created_at")[:20])
+
+    def test_api_list_keyset_page(self):
+        created_at = datetime(2030, 1, 1, tzinfo=dt_timezone.utc)
+        self.assertNoFullScan(
+            Booking.objects.order_by("-created_at", "-booking_id")
+            .filter(created_at__lte=created_at)
+            .exclude(created_at=created_at, booking_id__gte=100)[:21]
+        )
+
+    def test_user_bookings(self):
+        self.assertNoFullScan(Booking.objects.filter(user=self.user).order_by("-check_in_date")[:10])
+
+    def test_organization_bookings(self):
+        self.assertNoFullScan(
+            Booking.objects.select_related("guest", "room", "room__hotel")
+            .filter(room__hotel__owner=self.user)
+            .order_by("-check_in_date")[:10]
+        )
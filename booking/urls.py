@@ -22,9 +22,12 @@ urlpatterns = [
     path('organization/hotels/<int:pk>/edit/', views.HotelUpdateView.as_view(), name='hotel_edit'),
     path('organization/rooms/create/', views.RoomCreateView.as_view(), name='room_create'),
     path('organization/rooms/<int:pk>/edit/', views.RoomUpdateView.as_view(), name='room_edit'),
+    path('organization/bookings/export.csv', views.organization_bookings_export, {'export_format': 'csv'}, name='organization_bookings_export_csv'),
+    path('organization/bookings/export.ndjson', views.organization_bookings_export, {'export_format': 'ndjson'}, name='organization_bookings_export_ndjson'),
     
     # Номера
     path('rooms/', views.RoomListView.as_view(), name='rooms'),
+    path('rooms/picker/', views.room_picker, name='room_picker'),
     path('rooms/<int:pk>/', views.RoomDetailView.as_view(), name='room_detail'),
     path('rooms/<int:room_id>/check-availability/', views.check_room_availability, name='check_room_availability'),
     
@@ -1,3 +1,8 @@
+import csv
+import itertools
+import json
+from datetime import date, timedelta
+
 from asgiref.sync import sync_to_async
 
 from django.shortcuts import render, redirect, get_object_or_404
@@ -7,9 +12,17 @@ from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
+from . import catalogue, json_codec, rollups
+from .availability import availability_index
+from .counters import catalogue_counts, owner_counts
+from .inventory import NightsUnavailable
+from .search import RankedResults, matching, search_ids
 from .models import Room, Guest, Booking, Hotel, UserProfile
 from .forms import BookingForm, GuestForm, UserRegistrationForm, OrganizationRegistrationForm, UserProfileForm, HotelForm, RoomForm
 
@@ -20,9 +33,10 @@ class HomeView(TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['rooms_count'] = Room.objects.count()
-        context['guests_count'] = Guest.objects.count()
-        context['bookings_count'] = Booking.objects.count()
+        counts = catalogue_counts()
+        context['rooms_count'] = counts['rooms']
+        context['guests_count'] = counts['guests']
+        context['bookings_count'] = counts['bookings']
         context['available_rooms'] = Room.objects.select_related('hotel').all()[:3]
         return context
 
@@ -102,7 +116,7 @@ class ProfileView(LoginRequiredMixin, UpdateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['user_bookings'] = Booking.objects.filter(user=self.request.user).order_by('-check_in_date')[:10]
+        context['user_bookings'] = Booking.objects.select_related('room__hotel').filter(user=self.request.user).order_by('-check_in_date')[:10]
         return context
     
     def form_valid(self, form):
@@ -122,12 +136,111 @@ class OrganizationPanelView(LoginRequiredMixin, TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context['counts'] = owner_counts(self.request.user.pk)
+        # Показатели отелей за текущий месяц — только из сводок HotelDailyStats
+        month_start = timezone.now().date().replace(day=1)
+        month_end = (month_start + timedelta(days=32)).replace(day=1)
+        context['hotel_stats'] = rollups.owner_summary(self.request.user, month_start, month_end)
+        context['stats_month'] = month_start
         context['hotels'] = Hotel.objects.filter(owner=self.request.user)
-        context['rooms'] = Room.objects.filter(hotel__owner=self.request.user)
-        context['bookings'] = Booking.objects.filter(room__hotel__owner=self.request.user).order_by('-check_in_date')[:10]
+        context['rooms'] = Room.objects.select_related('hotel').filter(hotel__owner=self.request.user)
+        context['bookings'] = (
+            Booking.objects.select_related('guest', 'room')
+            .filter(room__hotel__owner=self.request.user)
+            .order_by('-check_in_date')[:10]
+        )
         return context
 
 
+# Колонки выгрузки бронирований организации: заголовок → поле для values_list
+ORGANIZATION_EXPORT_COLUMNS = (
+    ('id', 'booking_id'),
+    ('hotel', 'room__hotel__name'),
+    ('room', 'room__number'),
+    ('guest_last_name', 'guest__last_name'),
+    ('guest_first_name', 'guest__first_name'),
+    ('check_in_date', 'check_in_date'),
+    ('check_out_date', 'check_out_date'),
+    ('adults_count', 'adults_count'),
+    ('children_count', 'children_count'),
+    ('total_price', 'total_price'),
+    ('status', 'status'),
+    ('created_at', 'created_at'),
+)
+EXPORT_CHUNK_SIZE = 2000
+
+
+def _next_chunk(iterator):
+    return list(itertools.islice(iterator, EXPORT_CHUNK_SIZE))
+
+
+class _Echo:
+    """Псевдобуфер для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+@login_required
+def organization_bookings_export(request, export_format):
+    """Потоковая выгрузка бронирований отелей организации (CSV или NDJSON).
+
+    Фильтры: ?date_from=&date_to= (по дате заезда, YYYY-MM-DD) и ?status=.
+    Строки читаются итератором чанками, поэтому память не зависит от объёма выгрузки.
+    Под ASGI поток асинхронный, каждый чанк читается через sync_to_async: синхронный
+    итератор Django собрал бы в список целиком до отправки первого байта.
+    """
+    if not hasattr(request.user, 'profile') or not request.user.profile.is_organization:
+        messages.error(request, 'Доступ запрещен. Только для организаций.')
+        return redirect('booking:home')
+
+    queryset = Booking.objects.filter(room__hotel__owner=request.user)
+    try:
+        if request.GET.get('date_from'):
+            queryset = queryset.filter(check_in_date__gte=date.fromisoformat(request.GET['date_from']))
+        if request.GET.get('date_to'):
+            queryset = queryset.filter(check_in_date__lte=date.fromisoformat(request.GET['date_to']))
+    except ValueError:
+        return HttpResponseBadRequest('Даты должны быть в формате YYYY-MM-DD')
+    status = request.GET.get('status')
+    if status:
+        if status not in dict(Booking.STATUS_CHOICES):
+            return HttpResponseBadRequest('Неизвестный статус бронирования')
+        queryset = queryset.filter(status=status)
+
+    headers = [header for header, _ in ORGANIZATION_EXPORT_COLUMNS]
+    rows = (
+        queryset.order_by('-check_in_date', '-booking_id')
+        .values_list(*(field for _, field in ORGANIZATION_EXPORT_COLUMNS))
+    )
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        # BOM — чтобы Excel распознал UTF-8 (кириллица в именах гостей и отелей)
+        prefix = ['\ufeff', writer.writerow(headers)]
+        render_row = writer.writerow
+        content_type = 'text/csv; charset=utf-8'
+    else:
+        prefix = []
+        render_row = lambda row: json_codec.dumps(dict(zip(headers, row))) + b'\n'  # noqa: E731
+        content_type = 'application/x-ndjson'
+
+    if isinstance(request, ASGIRequest):
+        async def content():
+            for line in prefix:
+                yield line
+            # QuerySet.aiterator() для values_list выполняет запрос в event loop — читаем чанки сами
+            iterator = rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+            while chunk := await sync_to_async(_next_chunk)(iterator):
+                for row in chunk:
+                    yield render_row(row)
+        response = StreamingHttpResponse(content(), content_type=content_type)
+    else:
+        content = itertools.chain(prefix, map(render_row, rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)))
+        response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="bookings.{export_format}"'
+    return response
+
+
 class HotelCreateView(LoginRequiredMixin, CreateView):
     """Создание отеля"""
     model = Hotel
@@ -233,19 +346,12 @@ class RoomListView(ListView):
     paginate_by = 9
     
     def get_queryset(self):
-        queryset = Room.objects.select_related('hotel').all()
-        room_type = self.request.GET.get('type')
-        hotel_id = self.request.GET.get('hotel')
-        if room_type:
-            queryset = queryset.filter(type_name__icontains=room_type)
-        if hotel_id:
-            queryset = queryset.filter(hotel_id=hotel_id)
-        return queryset
+        # Число номеров и текущая страница берутся из кэша каталога
+        return catalogue.room_list(self.request.GET.get('type', ''), self.request.GET.get('hotel', ''))
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['room_types'] = Room.objects.values_list('type_name', flat=True).distinct()
-        context['hotels'] = Hotel.objects.all()
+        context['room_types'], context['hotels'] = catalogue.room_filters()
         return context
 
 
@@ -255,6 +361,12 @@ class RoomDetailView(DetailView):
     template_name = 'booking/room_detail.html'
     context_object_name = 'room'
     
+    def get_object(self, queryset=None):
+        try:
+            return catalogue.room_detail(self.kwargs['pk'])
+        except Room.DoesNotExist:
+            raise Http404('Номер не найден')
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Проверяем доступность номера
@@ -269,12 +381,9 @@ class RoomDetailView(DetailView):
                 check_out_date = datetime.strptime(check_out, '%Y-%m-%d').date()
                 
                 # Проверяем пересечения с существующими бронированиями
-                conflicting_bookings = Booking.objects.filter(
-                    room=self.object,
-                    check_in_date__lt=check_out_date,
-                    check_out_date__gt=check_in_date
+                context['is_available'] = availability_index.is_available(
+                    self.object.pk, check_in_date, check_out_date
                 )
-                context['is_available'] = not conflicting_bookings.exists()
                 context['check_in'] = check_in
                 context['check_out'] = check_out
             except ValueError:
@@ -294,12 +403,8 @@ class GuestListView(ListView):
         queryset = Guest.objects.all()
         search = self.request.GET.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(phone__icontains=search) |
-                Q(email__icontains=search)
-            )
+            # Полнотекстовый поиск: самые релевантные гости первыми, на страницу загружаются только её 20 гостей
+            queryset = RankedResults(queryset, search_ids(Guest, search))
         return queryset
 
 
@@ -311,7 +416,7 @@ class GuestDetailView(DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['bookings'] = self.object.bookings.all().order_by('-check_in_date')
+        context['bookings'] = self.object.bookings.select_related('room').order_by('-check_in_date')
         return context
 
 
@@ -348,18 +453,17 @@ class BookingListView(LoginRequiredMixin, ListView):
         
         search = self.request.GET.get('search')
         if search:
+            # Совпадения ищутся в индексах гостей и номеров; список остаётся упорядоченным по дате заезда
             queryset = queryset.filter(
-                Q(guest__first_name__icontains=search) |
-                Q(guest__last_name__icontains=search) |
-                Q(room__number__icontains=search) |
-                Q(room__name__icontains=search)
+                Q(guest_id__in=matching(Guest, search)) |
+                Q(room_id__in=matching(Room, search))
             )
         return queryset.order_by('-check_in_date')
 
 
 class BookingDetailView(DetailView):
     """Детальная информация о бронировании"""
-    model = Booking
+    queryset = Booking.objects.select_related('guest', 'room__hotel')
     template_name = 'booking/booking_detail.html'
     context_object_name = 'booking'
 
@@ -461,36 +565,26 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
         check_out_date = form.cleaned_data.get('check_out_date')
         room = form.cleaned_data.get('room')
         
-        # Атомарная проверка доступности прямо перед сохранением
+        # Бронирование и его ночи сохраняются в одной транзакции. Уникальный индекс RoomNight
+        # не даёт параллельному запросу (в т.ч. из другого процесса) занять те же ночи.
         if room and check_in_date and check_out_date:
-            from django.db import transaction
-            with transaction.atomic():
-                # Используем select_for_update для блокировки строки в БД
-                conflicting_bookings = Booking.objects.select_for_update().filter(
-                    room=room,
-                    check_in_date__lt=check_out_date,
-                    check_out_date__gt=check_in_date
+            try:
+                with transaction.atomic():
+                    booking = form.save(commit=False)
+                    booking.guest = guest
+                    booking.user = self.request.user
+                    booking.save()  # ночи занимает сигнал post_save
+            except NightsUnavailable as e:
+                # Формируем список дат занятости
+                dates_str = ', '.join(
+                    f"{booked_in.strftime('%d.%m.%Y')} - {booked_out.strftime('%d.%m.%Y')}"
+                    for booked_in, booked_out in e.conflicts
                 )
-                
-                if conflicting_bookings.exists():
-                    # Формируем список дат занятости
-                    booking_dates = []
-                    for booking in conflicting_bookings:
-                        booking_dates.append(
-                            f"{booking.check_in_date.strftime('%d.%m.%Y')} - {booking.check_out_date.strftime('%d.%m.%Y')}"
-                        )
-                    dates_str = ', '.join(booking_dates)
-                    messages.error(self.request, f'НОМЕР УЖЕ ЗАНЯТ в это время. Забронирован: {dates_str}. Пожалуйста, выберите другие даты.')
-                    context = self.get_context_data(form=form)
-                    if guest_id:
-                        context['selected_guest_id'] = int(guest_id) if guest_id.isdigit() else None
-                    return self.render_to_response(context)
-                
-                # Сохраняем бронирование внутри транзакции
-                booking = form.save(commit=False)
-                booking.guest = guest
-                booking.user = self.request.user
-                booking.save()
+                messages.error(self.request, f'НОМЕР УЖЕ ЗАНЯТ в это время. Забронирован: {dates_str}. Пожалуйста, выберите другие даты.')
+                context = self.get_context_data(form=form)
+                if guest_id:
+                    context['selected_guest_id'] = int(guest_id) if guest_id.isdigit() else None
+                return self.render_to_response(context)
         
         messages.success(self.request, 'Бронирование успешно создано!')
         return redirect(self.success_url)
@@ -505,9 +599,9 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
             else:
                 context['guest_form'] = GuestForm()
         context['guests'] = Guest.objects.all()[:10]  # Последние 10 гостей
-        # Добавляем информацию о ценах для JavaScript
-        import json
-        context['room_prices_json'] = json.dumps({str(room.pk): float(room.price_per_night) for room in Room.objects.filter(hotel__isnull=False)})
+        # Цены для JavaScript: только выбранный номер, остальные приходят из room_picker
+        selected = [(pk, catalogue.room_choice(pk)) for pk in context['form'].selected_room_ids()]
+        context['room_prices_json'] = json.dumps({str(pk): choice[1] for pk, choice in selected if choice})
         return context
 
 
@@ -518,6 +612,21 @@ class ContactView(TemplateView):
 
 from django.http import JsonResponse
 
+ROOM_PICKER_MAX_LIMIT = 50
+
+
+def room_picker(request):
+    """Поиск номеров по мере ввода для формы бронирования (?q=&limit=)"""
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), ROOM_PICKER_MAX_LIMIT)
+    except ValueError:
+        return JsonResponse({'error': 'limit должен быть целым числом'}, status=400)
+    results = catalogue.search_room_choices(request.GET.get('q', '').strip(), limit)
+    return JsonResponse({
+        'results': [{'id': pk, 'label': label, 'price': price} for pk, label, price in results]
+    })
+
+
 async def check_room_availability(request, room_id):
     """Проверка доступности номера через AJAX"""
     from datetime import datetime
@@ -530,7 +639,6 @@ async def check_room_availability(request, room_id):
         return JsonResponse({'error': 'Не указаны даты'}, status=400)
 
     try:
-        room = await Room.objects.aget(pk=room_id)
         check_in_date = datetime.strptime(check_in, '%Y-%m-%d').date()
         check_out_date = datetime.strptime(check_out, '%Y-%m-%d').date()
 
@@ -540,33 +648,30 @@ async def check_room_availability(request, room_id):
         if check_in_date < timezone.now().date():
             return JsonResponse({'error': 'Дата заезда не может быть в прошлом'}, status=400)
 
-        conflicting_bookings = Booking.objects.filter(
-            room=room,
-            check_in_date__lt=check_out_date,
-            check_out_date__gt=check_in_date,
-        ).order_by('check_in_date')
+        # При попадании в индекс запрос к БД не выполняется
+        room_availability = await availability_index.aget(room_id)
+        conflicting_bookings = room_availability.conflicts(check_in_date, check_out_date)
 
-        is_available = not await conflicting_bookings.aexists()
+        is_available = not conflicting_bookings
         nights = (check_out_date - check_in_date).days
-        total_price = float(room.price_per_night) * nights
-
-        booking_dates = []
-        if not is_available:
-            async for booking in conflicting_bookings:
-                booking_dates.append({
-                    'check_in': booking.check_in_date.strftime('%d.%m.%Y'),
-                    'check_out': booking.check_out_date.strftime('%d.%m.%Y'),
-                })
+        price_per_night = float(room_availability.price_per_night)
+        total_price = price_per_night * nights
 
         response_data = {
             'available': is_available,
             'nights': nights,
             'total_price': total_price,
-            'price_per_night': float(room.price_per_night),
+            'price_per_night': price_per_night,
         }
 
         if not is_available:
-            response_data['booking_dates'] = booking_dates
+            response_data['booking_dates'] = [
+                {
+                    'check_in': booked_in.strftime('%d.%m.%Y'),
+                    'check_out': booked_out.strftime('%d.%m.%Y'),
+                }
+                for booked_in, booked_out in conflicting_bookings
+            ]
 
         return JsonResponse(response_data)
     except Room.DoesNotExist:
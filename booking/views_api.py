@@ -1,177 +1,529 @@
 """
 REST API для микросервисной связки: Booking Service.
-Эндпоинты: GET/POST /api/bookings, GET /api/bookings/<id>, POST confirm-payment, POST cancel.
+Эндпоинты: GET/POST /api/bookings, POST /api/bookings/batch, GET /api/bookings/<id>,
+POST confirm-payment, POST cancel, GET /api/availability, GET /api/guests/suggest,
+GET /api/hotels/<id>/calendar, GET /api/hotels/<id>/stats.
+
+Представления асинхронные: чтения идут через async ORM (aget, afirst, acount,
+async for), поэтому под ASGI (hotel_booking.asgi) запрос не занимает поток на
+время ожидания. Записи, которые должны пройти в одной транзакции вместе с
+сигналами моделей (ночи, сводки, outbox), выполняются в sync_to_async.
 """
+import base64
+import binascii
 import json
-import logging
-from decimal import Decimal
-
-from django.http import JsonResponse
-from django.conf import settings
-from .kafka_producer import get_producer
+from datetime import datetime, timedelta
 
-import httpx
-from django.conf import settings
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from django.shortcuts import get_object_or_404
+from django.http import Http404
+from django.shortcuts import aget_object_or_404
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
 
+from . import occupancy, rollups
+from .availability import invalidate_rooms
+from .counters import invalidate_counters
+from .guest_index import guest_index
+from .inventory import NightsUnavailable, claim_nights_bulk
+from .json_codec import FastJsonResponse, loads
 from .metrics import metrics_response
-from .models import Booking, Room, Guest
+from .models import Booking, Hotel, Room, Guest, OutboxEvent
+from .outbox import payment_event
+
+# Максимальный размер страницы списка бронирований
+BOOKINGS_MAX_LIMIT = 100
+# Максимальный размер страницы поиска свободных номеров
+AVAILABILITY_MAX_LIMIT = 100
+# Максимальное число бронирований в одном пакетном запросе
+BATCH_MAX_ITEMS = 500
+# Максимальное число подсказок гостей
+GUEST_SUGGEST_MAX_LIMIT = 50
+# Максимальная длина календаря занятости (дни)
+CALENDAR_MAX_DAYS = 366
+
+
+# Поля бронирования в API: ключ JSON → поле модели. Порядок совпадает с values_list(*BOOKING_VALUE_FIELDS).
+BOOKING_API_FIELDS = (
+    ("id", "booking_id"),
+    ("roomId", "room_id"),
+    ("guestId", "guest_id"),
+    ("status", "status"),
+    ("checkInDate", "check_in_date"),
+    ("checkOutDate", "check_out_date"),
+    ("adultsCount", "adults_count"),
+    ("childrenCount", "children_count"),
+    ("totalPrice", "total_price"),
+    ("createdAt", "created_at"),
+)
+BOOKING_API_KEYS = tuple(key for key, _ in BOOKING_API_FIELDS)
+BOOKING_VALUE_FIELDS = tuple(field for _, field in BOOKING_API_FIELDS)
+_BOOKING_FIELD_BY_KEY = dict(BOOKING_API_FIELDS)
 
-logger = logging.getLogger(__name__)
+
+def _booking_row_to_json(row) -> dict:
+    """Строка values_list(*BOOKING_VALUE_FIELDS) → объект API; даты и Decimal кодирует json_codec."""
+    return dict(zip(BOOKING_API_KEYS, row))
 
 
 def _booking_to_json(booking: Booking) -> dict:
     """Сериализация бронирования в формат API (totalPrice вычислен при создании)."""
-    return {
-        "id": booking.booking_id,
-        "roomId": booking.room_id,
-        "guestId": booking.guest_id,
-        "status": booking.status,
-        "checkInDate": booking.check_in_date.isoformat(),
-        "checkOutDate": booking.check_out_date.isoformat(),
-        "adultsCount": booking.adults_count,
-        "childrenCount": booking.children_count,
-        "totalPrice": float(booking.total_price),
-        "createdAt": booking.created_at.isoformat() if booking.created_at else None,
-    }
+    return _booking_row_to_json([getattr(booking, field) for field in BOOKING_VALUE_FIELDS])
+
+
+def _requested_fields(request):
+    """?fields=id,status,... → (ключи API, поля модели) для проекции; ValueError при неизвестном поле."""
+    raw = request.GET.get("fields")
+    if not raw:
+        return BOOKING_API_KEYS, BOOKING_VALUE_FIELDS
+    keys = tuple(dict.fromkeys(key.strip() for key in raw.split(",") if key.strip()))
+    unknown = [key for key in keys if key not in _BOOKING_FIELD_BY_KEY]
+    if not keys or unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(BOOKING_API_KEYS)}")
+    return keys, tuple(_BOOKING_FIELD_BY_KEY[key] for key in keys)
+
+
+def _encode_cursor(created_at, booking_id) -> str:
+    """Непрозрачный курсор keyset-пагинации: позиция (created_at, booking_id) последнего элемента."""
+    raw = json.dumps([created_at.isoformat(), booking_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    """Обратное к _encode_cursor; ValueError при повреждённом курсоре."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, booking_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(booking_id)
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError("invalid cursor") from e
 
 
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
-def api_bookings_list_or_create(request):
-    """GET /api/bookings/ — список. POST /api/bookings/ — создание и вызов Payment Service."""
+async def api_bookings_list_or_create(request):
+    """GET /api/bookings/ — список (offset или ?cursor=). POST /api/bookings/ — создание и вызов Payment Service."""
     if request.method == "GET":
-        limit = int(request.GET.get("limit", 20))
-        offset = int(request.GET.get("offset", 0))
+        try:
+            limit = int(request.GET.get("limit", 20))
+            offset = int(request.GET.get("offset", 0))
+        except ValueError:
+            return FastJsonResponse({"error": "limit and offset must be integers", "code": "VALIDATION"}, status=400)
+        if limit < 1 or offset < 0:
+            return FastJsonResponse({"error": "limit must be positive, offset non-negative", "code": "VALIDATION"}, status=400)
+        limit = min(limit, BOOKINGS_MAX_LIMIT)
+        try:
+            keys, fields = _requested_fields(request)
+        except ValueError as e:
+            return FastJsonResponse({"error": str(e), "code": "VALIDATION"}, status=400)
         status = request.GET.get("status")
-        qs = Booking.objects.select_related("room", "guest").order_by("-created_at")
+        cursor = request.GET.get("cursor")
+        include_total = request.GET.get("include_total")
+        qs = Booking.objects.order_by("-created_at", "-booking_id")
         if status:
             qs = qs.filter(status=status)
-        total = qs.count()
-        items = qs[offset : offset + limit]
-        return JsonResponse({
-            "items": [_booking_to_json(b) for b in items],
-            "total": total,
-            "limit": limit,
-            "offset": offset,
-        })
-    return _api_create_booking(request)
-
-
-def _api_create_booking(request):
-    """POST /api/bookings/ — создание бронирования, вызов Payment Service."""
-    try:
-        body = json.loads(request.body)
-    except json.JSONDecodeError as e:
-        return JsonResponse({"error": "Invalid JSON", "code": "INVALID_JSON"}, status=400)
+        data = {"limit": limit}
+        if cursor:
+            # Keyset-режим: страница после (created_at, booking_id) из курсора, без OFFSET и COUNT(*)
+            try:
+                created_at, last_id = _decode_cursor(cursor)
+            except ValueError:
+                return FastJsonResponse({"error": "Invalid cursor", "code": "INVALID_CURSOR"}, status=400)
+            page = qs.filter(created_at__lte=created_at).exclude(created_at=created_at, booking_id__gte=last_id)
+            with_total = include_total == "1"
+        else:
+            # Offset-режим оставлен для совместимости; total по умолчанию включён
+            page = qs[offset:]
+            data["offset"] = offset
+            with_total = include_total != "0"
+        # Кортежи values_list только с запрошенными полями (без создания экземпляров модели).
+        # Позиция курсора дочитывается в конец строки и в ответ не попадает.
+        rows = [row async for row in page.values_list(*fields, "created_at", "booking_id")[: limit + 1]]
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        data["items"] = [dict(zip(keys, row)) for row in rows]
+        data["next_cursor"] = _encode_cursor(rows[-1][-2], rows[-1][-1]) if has_more and rows else None
+        if with_total:
+            data["total"] = await qs.acount()
+        return FastJsonResponse(data)
+    return await _api_create_booking(request)
+
+
+def _parse_booking_payload(body):
+    """Валидация тела создания бронирования. Возвращает (поля, None) или (None, текст ошибки)."""
+    if not isinstance(body, dict):
+        return None, "Booking must be a JSON object"
     room_id = body.get("roomId")
     guest_id = body.get("guestId")
     check_in = body.get("checkInDate")
     check_out = body.get("checkOutDate")
-    adults_count = body.get("adultsCount", 1)
-    children_count = body.get("childrenCount", 0)
-    special_requests = body.get("specialRequests") or ""
     if not all([room_id, guest_id, check_in, check_out]):
-        return JsonResponse(
-            {"error": "roomId, guestId, checkInDate, checkOutDate required", "code": "VALIDATION"},
-            status=400,
-        )
-    from datetime import datetime
+        return None, "roomId, guestId, checkInDate, checkOutDate required"
+    try:
+        room_id, guest_id = int(room_id), int(guest_id)
+    except (TypeError, ValueError):
+        return None, "roomId and guestId must be integers"
     try:
         check_in_date = datetime.strptime(check_in, "%Y-%m-%d").date()
         check_out_date = datetime.strptime(check_out, "%Y-%m-%d").date()
-    except ValueError:
-        return JsonResponse({"error": "Dates must be YYYY-MM-DD", "code": "VALIDATION"}, status=400)
-    room = get_object_or_404(Room, pk=room_id)
-    guest = get_object_or_404(Guest, pk=guest_id)
+    except (TypeError, ValueError):
+        return None, "Dates must be YYYY-MM-DD"
     if check_in_date >= check_out_date:
-        return JsonResponse({"error": "checkOutDate must be after checkInDate", "code": "VALIDATION"}, status=400)
-    total_price = room.calculate_price(check_in_date, check_out_date)
+        return None, "checkOutDate must be after checkInDate"
+    try:
+        adults_count = int(body.get("adultsCount", 1))
+        children_count = int(body.get("childrenCount", 0))
+    except (TypeError, ValueError):
+        return None, "adultsCount and childrenCount must be integers"
+    if adults_count < 1 or children_count < 0:
+        return None, "adultsCount must be at least 1, childrenCount non-negative"
+    return {
+        "room_id": room_id,
+        "guest_id": guest_id,
+        "check_in_date": check_in_date,
+        "check_out_date": check_out_date,
+        "adults_count": adults_count,
+        "children_count": children_count,
+        "special_requests": body.get("specialRequests") or "",
+    }, None
+
+
+def _save_new_booking(booking):
+    """Бронирование, его ночи (сигнал post_save) и событие оплаты — в одной транзакции;
+    в Kafka событие отправит relay_outbox."""
+    with transaction.atomic():
+        booking.save()
+        payment_event(booking).save()
+
+
+async def _api_create_booking(request):
+    """POST /api/bookings/ — создание бронирования и события оплаты для Payment Service (outbox)."""
+    try:
+        body = loads(request.body)
+    except ValueError:
+        return FastJsonResponse({"error": "Invalid JSON", "code": "INVALID_JSON"}, status=400)
+    fields, error = _parse_booking_payload(body)
+    if error:
+        return FastJsonResponse({"error": error, "code": "VALIDATION"}, status=400)
+    room = await aget_object_or_404(Room, pk=fields.pop("room_id"))
+    guest = await aget_object_or_404(Guest, pk=fields.pop("guest_id"))
     booking = Booking(
         room=room,
         guest=guest,
-        check_in_date=check_in_date,
-        check_out_date=check_out_date,
-        adults_count=adults_count,
-        children_count=children_count,
-        total_price=total_price,
-        special_requests=special_requests,
+        total_price=room.calculate_price(fields["check_in_date"], fields["check_out_date"]),
         status=Booking.STATUS_PAYMENT_PENDING,
+        **fields,
     )
-    booking.save()
+    try:
+        await sync_to_async(_save_new_booking)(booking)
+    except NightsUnavailable:
+        return FastJsonResponse({"error": "Room is already booked for these dates", "code": "CONFLICT"}, status=409)
+    return FastJsonResponse(_booking_to_json(booking), status=201)
 
 
-    payload = {
-        "bookingId": booking.booking_id,
-        "amount": float(total_price),
-        "currency": "RUB",
-    }
+@csrf_exempt
+@require_http_methods(["POST"])
+async def api_create_bookings_batch(request):
+    """POST /api/bookings/batch/ — групповое бронирование: одна транзакция на весь пакет.
+
+    Тело: {"items": [<CreateBookingRequest>, ...]}. Ответ содержит результат по каждому элементу
+    в исходном порядке: created (с бронированием), invalid, not_found или conflict.
+    """
     try:
-        producer = get_producer()
-        producer.send(
-            settings.KAFKA_PAYMENT_TOPIC,
-            value={
-                "booking_id": booking.booking_id,
-                "amount": payload.get("amount"),
-                "guest_id": guest_id,
-            },
+        body = loads(request.body)
+    except ValueError:
+        return FastJsonResponse({"error": "Invalid JSON", "code": "INVALID_JSON"}, status=400)
+    items = body.get("items") if isinstance(body, dict) else None
+    if not isinstance(items, list) or not items:
+        return FastJsonResponse({"error": "items must be a non-empty list", "code": "VALIDATION"}, status=400)
+    if len(items) > BATCH_MAX_ITEMS:
+        return FastJsonResponse(
+            {"error": f"At most {BATCH_MAX_ITEMS} items per batch", "code": "VALIDATION"}, status=400
         )
 
-        booking.status = Booking.STATUS_PAYMENT_PENDING
-        booking.save(update_fields=["status"])
-
-        return JsonResponse(_booking_to_json(booking), status=201)
-    except Exception as e:
-        logger.exception("Kafka send failed: %s", e)
-        booking.status = Booking.STATUS_PAYMENT_FAILED
-        booking.save(update_fields=["status"])
-        return JsonResponse(
-            {"error": "Payment enqueue failed", "code": "KAFKA_ERROR"},
-            status=503,
+    results, created = await sync_to_async(_create_bookings_batch)(items)
+    return FastJsonResponse({
+        "results": results,
+        "created": created,
+        "failed": len(items) - created,
+    }, status=201 if created else 200)
+
+
+def _create_bookings_batch(items):
+    """Создаёт пакет в одной транзакции. Возвращает (результаты по элементам, число созданных)."""
+    results = [None] * len(items)
+    parsed = {}
+    for index, item in enumerate(items):
+        fields, error = _parse_booking_payload(item)
+        if error:
+            results[index] = {"index": index, "result": "invalid", "error": error, "code": "VALIDATION"}
+        else:
+            parsed[index] = fields
+
+    rooms = Room.objects.in_bulk({f["room_id"] for f in parsed.values()})
+    guests = Guest.objects.in_bulk({f["guest_id"] for f in parsed.values()})
+    for index, fields in list(parsed.items()):
+        if fields["room_id"] not in rooms or fields["guest_id"] not in guests:
+            results[index] = {"index": index, "result": "not_found", "error": "Room or guest not found", "code": "NOT_FOUND"}
+            del parsed[index]
+
+    created = []
+    with transaction.atomic():
+        # Занятость всех номеров пакета — одним запросом
+        booked = {}
+        if parsed:
+            rows = Booking.objects.filter(
+                room_id__in={f["room_id"] for f in parsed.values()},
+                check_in_date__lt=max(f["check_out_date"] for f in parsed.values()),
+                check_out_date__gt=min(f["check_in_date"] for f in parsed.values()),
+            ).exclude(status=Booking.STATUS_CANCELLED).values_list("room_id", "check_in_date", "check_out_date")
+            for room_id, booked_in, booked_out in rows:
+                booked.setdefault(room_id, []).append((booked_in, booked_out))
+
+        for index, fields in parsed.items():
+            room = rooms[fields["room_id"]]
+            intervals = booked.setdefault(room.pk, [])
+            if any(booked_in < fields["check_out_date"] and booked_out > fields["check_in_date"] for booked_in, booked_out in intervals):
+                results[index] = {"index": index, "result": "conflict", "error": "Room is already booked for these dates", "code": "CONFLICT"}
+                continue
+            # Учитываем и пересечения внутри самого пакета
+            intervals.append((fields["check_in_date"], fields["check_out_date"]))
+            booking = Booking(
+                room=room,
+                guest=guests[fields["guest_id"]],
+                check_in_date=fields["check_in_date"],
+                check_out_date=fields["check_out_date"],
+                adults_count=fields["adults_count"],
+                children_count=fields["children_count"],
+                special_requests=fields["special_requests"],
+                total_price=room.calculate_price(fields["check_in_date"], fields["check_out_date"]),
+                status=Booking.STATUS_PAYMENT_PENDING,
+            )
+            created.append((index, booking))
+
+        Booking.objects.bulk_create([booking for _, booking in created])
+        # Проверка выше видит только закоммиченные брони; ночи ловят параллельные пакеты
+        lost = {booking.pk for booking in claim_nights_bulk([booking for _, booking in created])}
+        # bulk_create не отправляет сигналы — сводки учитываем вручную, до удаления проигравших:
+        # их post_delete вычитает вклад, который должен быть уже записан
+        rollups.record_bookings([booking for _, booking in created])
+        if lost:
+            Booking.objects.filter(pk__in=lost).delete()
+            for index, booking in created:
+                if booking.pk in lost:
+                    results[index] = {"index": index, "result": "conflict", "error": "Room is already booked for these dates", "code": "CONFLICT"}
+            created = [(index, booking) for index, booking in created if booking.pk not in lost]
+        OutboxEvent.objects.bulk_create([payment_event(booking) for _, booking in created])
+        # Индекс занятости и счётчики тоже обновляем вручную
+        invalidate_rooms(*{booking.room_id for _, booking in created})
+        invalidate_counters()
+
+    for index, booking in created:
+        results[index] = {"index": index, "result": "created", "booking": _booking_to_json(booking)}
+    return results, len(created)
+
+
+@require_http_methods(["GET"])
+async def api_availability_search(request):
+    """GET /api/availability/ — свободные номера на даты одним запросом (anti-join), по возрастанию цены."""
+    check_in = request.GET.get("check_in")
+    check_out = request.GET.get("check_out")
+    if not check_in or not check_out:
+        return FastJsonResponse({"error": "check_in and check_out required", "code": "VALIDATION"}, status=400)
+    try:
+        check_in_date = datetime.strptime(check_in, "%Y-%m-%d").date()
+        check_out_date = datetime.strptime(check_out, "%Y-%m-%d").date()
+        limit = int(request.GET.get("limit", 20))
+        offset = int(request.GET.get("offset", 0))
+        guests = int(request.GET.get("guests", 1))
+        hotel_id = int(request.GET["hotel"]) if request.GET.get("hotel") else None
+    except ValueError:
+        return FastJsonResponse(
+            {"error": "Dates must be YYYY-MM-DD, limit/offset/guests/hotel must be integers", "code": "VALIDATION"},
+            status=400,
         )
+    if check_in_date >= check_out_date:
+        return FastJsonResponse({"error": "check_out must be after check_in", "code": "VALIDATION"}, status=400)
+    if limit < 1 or offset < 0 or guests < 1:
+        return FastJsonResponse({"error": "limit and guests must be positive, offset non-negative", "code": "VALIDATION"}, status=400)
+    limit = min(limit, AVAILABILITY_MAX_LIMIT)
+    nights = (check_out_date - check_in_date).days
+
+    overlapping = Booking.objects.filter(
+        room=OuterRef("pk"),
+        check_in_date__lt=check_out_date,
+        check_out_date__gt=check_in_date,
+    ).exclude(status=Booking.STATUS_CANCELLED)
+    qs = Room.objects.filter(~Exists(overlapping))
+    room_type = request.GET.get("type")
+    if hotel_id is not None:
+        qs = qs.filter(hotel_id=hotel_id)
+    if room_type:
+        qs = qs.filter(type_name__icontains=room_type)
+    # У Room нет вместимости, поэтому guests пока только валидируется и возвращается в ответе
+    qs = qs.order_by("price_per_night", "room_id")
+
+    total = await qs.acount()
+    rows = [
+        row async for row in qs.values_list(
+            "room_id", "hotel_id", "hotel__name", "number", "name", "type_name", "price_per_night"
+        )[offset : offset + limit]
+    ]
+    items = [
+        {
+            "roomId": room_id,
+            "hotelId": room_hotel_id,
+            "hotelName": hotel_name,
+            "number": number,
+            "name": name,
+            "typeName": type_name,
+            "pricePerNight": price,
+            "totalPrice": price * nights,
+        }
+        for room_id, room_hotel_id, hotel_name, number, name, type_name, price in rows
+    ]
+    return FastJsonResponse({
+        "items": items,
+        "checkInDate": check_in_date,
+        "checkOutDate": check_out_date,
+        "nights": nights,
+        "guests": guests,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+    })
+
+
+@require_http_methods(["GET"])
+async def api_guest_suggest(request):
+    """GET /api/guests/suggest/?q= — гости, у которых фамилия, паспорт или телефон начинаются с q."""
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return FastJsonResponse({"error": "q required", "code": "VALIDATION"}, status=400)
+    try:
+        limit = int(request.GET.get("limit", 10))
+    except ValueError:
+        return FastJsonResponse({"error": "limit must be an integer", "code": "VALIDATION"}, status=400)
+    if limit < 1:
+        return FastJsonResponse({"error": "limit must be positive", "code": "VALIDATION"}, status=400)
+    # Индекс процессный; в БД он обращается только при (пере)построении
+    rows = await sync_to_async(guest_index.suggest)(query, min(limit, GUEST_SUGGEST_MAX_LIMIT))
+    return FastJsonResponse({
+        "items": [
+            {
+                "id": guest_id,
+                "lastName": last_name,
+                "firstName": first_name,
+                "middleName": middle_name,
+                "passportNumber": passport_number,
+                "phone": phone,
+                "email": email,
+            }
+            for guest_id, last_name, first_name, middle_name, passport_number, phone, email in rows
+        ],
+        "query": query,
+    })
+
+
+@require_http_methods(["GET"])
+async def api_hotel_calendar(request, hotel_id):
+    """GET /api/hotels/<id>/calendar/?from=&days= — занятость всех номеров отеля по дням (срез битовой карты)."""
+    try:
+        start = datetime.strptime(request.GET["from"], "%Y-%m-%d").date() if request.GET.get("from") else timezone.now().date()
+        days = int(request.GET.get("days", 90))
+    except ValueError:
+        return FastJsonResponse({"error": "from must be YYYY-MM-DD, days must be an integer", "code": "VALIDATION"}, status=400)
+    if not 1 <= days <= CALENDAR_MAX_DAYS:
+        return FastJsonResponse({"error": f"days must be between 1 and {CALENDAR_MAX_DAYS}", "code": "VALIDATION"}, status=400)
+    try:
+        rows = await sync_to_async(occupancy.calendar)(hotel_id, start, days)
+    except Hotel.DoesNotExist:
+        raise Http404("Hotel not found")
+    return FastJsonResponse({
+        "hotelId": hotel_id,
+        "from": start,
+        "days": days,
+        "rooms": [{"roomId": room_id, "number": number, "occupied": occupied} for room_id, number, occupied in rows],
+    })
+
+
+@require_http_methods(["GET"])
+async def api_hotel_stats(request, hotel_id):
+    """GET /api/hotels/<id>/stats/?from=&to=&granularity=day|month — загрузка, ADR и выручка из сводок."""
+    if not await Hotel.objects.filter(pk=hotel_id).aexists():
+        raise Http404("Hotel not found")
+    today = timezone.now().date()
+    try:
+        start = datetime.strptime(request.GET["from"], "%Y-%m-%d").date() if request.GET.get("from") else today.replace(day=1)
+        end = datetime.strptime(request.GET["to"], "%Y-%m-%d").date() if request.GET.get("to") else today + timedelta(days=1)
+    except ValueError:
+        return FastJsonResponse({"error": "from and to must be YYYY-MM-DD", "code": "VALIDATION"}, status=400)
+    granularity = request.GET.get("granularity", "day")
+    if granularity not in ("day", "month"):
+        return FastJsonResponse({"error": "granularity must be day or month", "code": "VALIDATION"}, status=400)
+    if start >= end:
+        return FastJsonResponse({"error": "to must be after from", "code": "VALIDATION"}, status=400)
+    items = [
+        {
+            "period": item["period"],
+            "roomsSold": item["rooms_sold"],
+            "occupancy": item["occupancy"],
+            "adr": item["adr"],
+            "revenue": item["revenue"],
+            "paidRevenue": item["paid_revenue"],
+        }
+        for item in await sync_to_async(rollups.hotel_stats)(hotel_id, start, end, granularity)
+    ]
+    return FastJsonResponse({"hotelId": hotel_id, "from": start, "to": end, "granularity": granularity, "items": items})
 
 
 @csrf_exempt
 @require_http_methods(["GET"])
-def api_get_booking(request, booking_id):
-    """GET /api/bookings/<id>/ — одно бронирование."""
-    booking = get_object_or_404(Booking, booking_id=booking_id)
-    return JsonResponse(_booking_to_json(booking))
+async def api_get_booking(request, booking_id):
+    """GET /api/bookings/<id>/ — одно бронирование (?fields= — только перечисленные поля)."""
+    try:
+        keys, fields = _requested_fields(request)
+    except ValueError as e:
+        return FastJsonResponse({"error": str(e), "code": "VALIDATION"}, status=400)
+    row = await Booking.objects.filter(booking_id=booking_id).values_list(*fields).afirst()
+    if row is None:
+        raise Http404("Booking not found")
+    return FastJsonResponse(dict(zip(keys, row)))
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
-def api_confirm_payment(request, booking_id):
+async def api_confirm_payment(request, booking_id):
     """POST /api/bookings/<id>/confirm-payment/ — подтверждение оплаты (вызывает Notification Service)."""
-    booking = get_object_or_404(Booking, booking_id=booking_id)
+    booking = await aget_object_or_404(Booking, booking_id=booking_id)
     if booking.status != Booking.STATUS_PAYMENT_PENDING:
-        return JsonResponse(
+        return FastJsonResponse(
             {"error": "Booking status is not PAYMENT_PENDING", "code": "INVALID_STATUS"},
             status=400,
         )
     booking.status = Booking.STATUS_PAID
-    booking.save(update_fields=["status"])
-    return JsonResponse({"ok": True})
+    # asave, а не aupdate: сигналы (сводки, ночи) должны увидеть смену статуса
+    await booking.asave(update_fields=["status"])
+    return FastJsonResponse({"ok": True})
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
-def api_cancel_booking(request, booking_id):
+async def api_cancel_booking(request, booking_id):
     """POST /api/bookings/<id>/cancel/ — отмена бронирования."""
-    booking = get_object_or_404(Booking, booking_id=booking_id)
+    booking = await aget_object_or_404(Booking, booking_id=booking_id)
     booking.status = Booking.STATUS_CANCELLED
-    booking.save(update_fields=["status"])
-    return JsonResponse({"ok": True})
+    await booking.asave(update_fields=["status"])
+    return FastJsonResponse({"ok": True})
 
 
 @require_http_methods(["GET"])
-def api_health(request):
-    return JsonResponse({"status": "ok", "service": "booking-service"})
+async def api_health(request):
+    return FastJsonResponse({"status": "ok", "service": "booking-service"})
 
 
 @require_http_methods(["GET"])
-def api_metrics(request):
+async def api_metrics(request):
     return metrics_response()
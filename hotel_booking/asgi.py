@@ -3,6 +3,9 @@ ASGI config for hotel_booking project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Боевой запуск (несколько процессов, async-представления REST API):
+    uvicorn hotel_booking.asgi:application --host 0.0.0.0 --port 8000 --workers 4
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -14,3 +17,11 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hotel_booking.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.DEBUG:
+    # Как runserver: при DEBUG статику отдаёт сам Django
+    from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+
+    application = ASGIStaticFilesHandler(application)
@@ -1,3 +1,4 @@
+import logging
 import time
 from contextlib import asynccontextmanager
 
@@ -5,13 +6,20 @@ from fastapi import FastAPI
 
 from app.config import settings
 from app.database import init_db
-from app.metrics import REQUEST_COUNT, REQUEST_LATENCY, render_metrics
+from app.metrics import (
+    REQUEST_COUNT, REQUEST_DB_QUERIES, REQUEST_DB_TIME, REQUEST_LATENCY, cleanup_stale_files, render_metrics, route_label,
+    track_queries,
+)
 from app.routers import notifications
 
+logger = logging.getLogger(__name__)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    # Live-gauge файлы завершившихся процессов (режим PROMETHEUS_MULTIPROC_DIR)
+    cleanup_stale_files()
     yield
 
 
@@ -31,11 +39,23 @@ app.include_router(notifications.router)
 @app.middleware("http")
 async def metrics_middleware(request, call_next):
     start = time.perf_counter()
-    response = await call_next(request)
+    with track_queries() as stats:
+        response = await call_next(request)
     duration = time.perf_counter() - start
-    path = request.url.path
+    # Шаблон маршрута (заполняется роутером в scope) — число рядов не растёт с числом id
+    path = route_label(request)
     REQUEST_COUNT.labels(request.method, path, str(response.status_code)).inc()
     REQUEST_LATENCY.labels(request.method, path).observe(duration)
+    REQUEST_DB_QUERIES.labels(request.method, path).observe(stats.count)
+    REQUEST_DB_TIME.labels(request.method, path).observe(stats.duration)
+    if settings.server_timing_header:
+        response.headers["Server-Timing"] = f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"'
+    if stats.count > settings.query_budget_per_request:
+        logger.warning(
+            "Query budget exceeded: %s %s (%s) made %d queries in %.1f ms, budget %d",
+            request.method, request.url.path, path, stats.count, stats.duration * 1000,
+            settings.query_budget_per_request,
+        )
     return response
 
 
@@ -6,6 +6,8 @@ from fastapi.testclient import TestClient
 os.environ.setdefault("NOTIFICATION_DATABASE_URL", "sqlite:///./test_notification_service.db")
 os.environ.setdefault("NOTIFICATION_BOOKING_SERVICE_URL", "http://testserver")
 
+from sqlalchemy import text
+
 from app.database import Base, engine
 from app.main import app
 
@@ -17,6 +19,8 @@ def setup_module():
 
 def teardown_module():
     Base.metadata.drop_all(bind=engine)
+    # Закрываем соединения пула, чтобы SQLite сбросил и удалил -wal/-shm
+    engine.dispose()
     db_file = Path("test_notification_service.db")
     if db_file.exists():
         db_file.unlink()
@@ -31,3 +35,50 @@ def test_health_and_metrics():
         metrics = client.get("/metrics")
         assert metrics.status_code == 200
         assert "notification_http_requests_total" in metrics.text
+
+
+def test_sqlite_connection_profile():
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+
+def test_metrics_labelled_by_route_template():
+    with TestClient(app) as client:
+        client.get("/api/notifications/987654")
+        client.get("/no-such-route")
+        text_metrics = client.get("/metrics").text
+    assert 'path="/api/notifications/{notification_id}"' in text_metrics
+    assert 'path="unmatched"' in text_metrics
+    assert "987654" not in text_metrics
+
+
+def test_db_queries_per_request(monkeypatch, caplog):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "server_timing_header", True)
+    monkeypatch.setattr(settings, "query_budget_per_request", 0)
+    with TestClient(app) as client:
+        response = client.get("/api/notifications")
+    assert response.status_code == 200
+    assert 'desc="0 queries"' not in response.headers["Server-Timing"]
+    assert "Query budget exceeded: GET /api/notifications" in caplog.text
+
+
+def test_failed_query_does_not_skew_timing():
+    import time
+
+    import pytest
+    from sqlalchemy.exc import OperationalError
+
+    from app.metrics import track_queries
+
+    with engine.connect() as connection, track_queries() as stats:
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM no_such_table"))
+        time.sleep(0.2)
+        connection.execute(text("SELECT 1"))
+    assert stats.count == 2
+    # Пауза между запросами не попадает ни в упавший, ни в следующий запрос
+    assert stats.duration < 0.2
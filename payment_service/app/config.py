@@ -10,6 +10,18 @@ class Settings(BaseSettings):
     # База данных (SQLite по умолчанию)
     database_url: str = "sqlite:///./payment_service.db"
 
+    # Профиль подключения к БД. SQLite: прагмы на каждом соединении (WAL, ожидание
+    # блокировки вместо «database is locked»). Серверная СУБД: пул с pre-ping и recycle.
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+
     # Порт сервера (по OpenAPI — 8082)
     host: str = "0.0.0.0"
     port: int = 8082
@@ -31,6 +43,12 @@ class Settings(BaseSettings):
     kafka_consumer_group: str = "payment-service"
     kafka_consumer_enabled: bool = True
 
+    # Предел различных значений метки path в метриках HTTP; сверх него — "other"
+    metrics_max_path_labels: int = 200
+    # Учёт SQL на запрос: заголовок Server-Timing и предел числа запросов, сверх которого пишем в журнал
+    server_timing_header: bool = False
+    query_budget_per_request: int = 30
+
     class Config:
         env_prefix = "PAYMENT_"
         env_file = ".env"
@@ -1,6 +1,31 @@
-from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+from sqlalchemy import event
 from starlette.responses import Response
 
+from app.config import settings
+
+# Режим нескольких процессов (воркеры uvicorn/gunicorn): если задан
+# PROMETHEUS_MULTIPROC_DIR, prometheus_client пишет значения в mmap-файлы каталога,
+# а /metrics суммирует файлы всех процессов. Без переменной — обычный реестр процесса.
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+if MULTIPROC_DIR:
+    # Файлы метрик без меток создаются уже при объявлении метрик ниже
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+# Метка path для запросов, не сопоставленных ни с одним маршрутом (404 до обработчика)
+UNMATCHED_PATH = "unmatched"
+# Метка path, в которую сводятся маршруты сверх metrics_max_path_labels
+OVERFLOW_PATH = "other"
+
 REQUEST_COUNT = Counter(
     "payment_http_requests_total",
     "Total HTTP requests for payment service",
@@ -13,6 +38,144 @@ REQUEST_LATENCY = Histogram(
     ["method", "path"],
 )
 
+REQUEST_DB_QUERIES = Histogram(
+    "payment_http_request_db_queries",
+    "SQL statements executed per HTTP request",
+    ["method", "path"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233),
+)
+
+REQUEST_DB_TIME = Histogram(
+    "payment_http_request_db_seconds",
+    "Total time spent in SQL statements per HTTP request",
+    ["method", "path"],
+)
+
+
+class BoundedLabelValues:
+    """Пропускает не больше limit различных значений метки; остальные сводятся в overflow."""
+
+    def __init__(self, limit, overflow=OVERFLOW_PATH):
+        self.limit = limit
+        self.overflow = overflow
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, value):
+        if value in self._seen:
+            return value
+        with self._lock:
+            if value not in self._seen:
+                if len(self._seen) >= self.limit:
+                    return self.overflow
+                self._seen.add(value)
+        return value
+
+
+path_label = BoundedLabelValues(settings.metrics_max_path_labels)
+
+
+def route_label(request) -> str:
+    """Шаблон маршрута вместо сырого пути: /api/payments/{payment_id}, а не /api/payments/<uuid>."""
+    route = request.scope.get("route")
+    if route is None:
+        return UNMATCHED_PATH
+    return path_label(route.path)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def cleanup_stale_files(directory=None):
+    """Убирает live-gauge файлы завершившихся процессов (прошлый запуск, упавшие воркеры). Возвращает число pid.
+
+    Счётчики и гистограммы завершившихся процессов остаются в сумме, иначе значения
+    пошли бы вниз; каталог целиком очищается при старте развёртывания (docker-compose).
+    """
+    directory = directory or MULTIPROC_DIR
+    if not directory:
+        return 0
+    dead = set()
+    for path in Path(directory).glob("gauge_live*_*.db"):
+        pid = path.stem.rsplit("_", 1)[-1]
+        if pid.isdigit() and not _pid_alive(int(pid)):
+            dead.add(int(pid))
+    for pid in dead:
+        multiprocess.mark_process_dead(pid, directory)
+    return len(dead)
+
+
+def _registry():
+    if not MULTIPROC_DIR:
+        return REGISTRY
+    # Новый реестр на каждый сбор, как рекомендует prometheus_client
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+class QueryStats:
+    """Число SQL-запросов и суммарное время в БД (секунды)."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+# contextvar копируется в threadpool синхронных обработчиков, объект учёта — общий
+_current_stats = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries():
+    """Учитывает SQL-запросы внутри блока: with track_queries() as stats."""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+# Время старта хранится в контексте выполнения запроса: у каждого запроса своё,
+# и упавший запрос не оставляет его следующему
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+def _record_query(context):
+    start = getattr(context, "_query_start", None)
+    stats = _current_stats.get()
+    if start is None or stats is None:
+        return
+    del context._query_start
+    stats.duration += time.perf_counter() - start
+    stats.count += 1
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_query(context)
+
+
+def _handle_error(exception_context):
+    # Упавший запрос тоже ходил в БД — учитываем его, как и успешный
+    _record_query(exception_context.execution_context)
+
+
+def instrument_engine(engine):
+    """Подключает учёт запросов (track_queries) к событиям SQLAlchemy engine."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
 
 def render_metrics() -> Response:
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(_registry()), media_type=CONTENT_TYPE_LATEST)
@@ -7,6 +7,8 @@ os.environ.setdefault("PAYMENT_KAFKA_CONSUMER_ENABLED", "false")
 os.environ.setdefault("PAYMENT_DATABASE_URL", "sqlite:///./test_payment_service.db")
 os.environ.setdefault("PAYMENT_RECEIPTS_DIR", "./test_receipts")
 
+from sqlalchemy import text
+
 from app.database import Base, engine
 from app.main import app
 
@@ -18,6 +20,8 @@ def setup_module():
 
 def teardown_module():
     Base.metadata.drop_all(bind=engine)
+    # Закрываем соединения пула, чтобы SQLite сбросил и удалил -wal/-shm
+    engine.dispose()
     db_file = Path("test_payment_service.db")
     if db_file.exists():
         db_file.unlink()
@@ -32,3 +36,58 @@ def test_health_and_metrics():
         metrics = client.get("/metrics")
         assert metrics.status_code == 200
         assert "payment_http_requests_total" in metrics.text
+
+
+def test_sqlite_connection_profile():
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+
+def test_metrics_labelled_by_route_template():
+    with TestClient(app) as client:
+        client.get("/api/payments/3f2b1c9e-0000-4000-8000-000000000001")
+        client.get("/no-such-route")
+        text_metrics = client.get("/metrics").text
+    assert 'path="/api/payments/{payment_id}"' in text_metrics
+    assert 'path="unmatched"' in text_metrics
+    assert "3f2b1c9e" not in text_metrics
+
+
+def test_bounded_label_values():
+    from app.metrics import BoundedLabelValues
+
+    labels = BoundedLabelValues(2)
+    assert [labels(value) for value in ("/a", "/b", "/c", "/a")] == ["/a", "/b", "other", "/a"]
+
+
+def test_db_queries_per_request(monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "server_timing_header", True)
+    with TestClient(app) as client:
+        response = client.get("/api/payments", params={"limit": 5})
+        metrics_text = client.get("/metrics").text
+    assert response.status_code == 200
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert 'desc="0 queries"' not in response.headers["Server-Timing"]
+    assert 'payment_http_request_db_queries_count{method="GET",path="/api/payments"}' in metrics_text
+
+
+def test_failed_query_does_not_skew_timing():
+    import time
+
+    import pytest
+    from sqlalchemy.exc import OperationalError
+
+    from app.metrics import track_queries
+
+    with engine.connect() as connection, track_queries() as stats:
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM no_such_table"))
+        time.sleep(0.2)
+        connection.execute(text("SELECT 1"))
+    assert stats.count == 2
+    # Пауза между запросами не попадает ни в упавший, ни в следующий запрос
+    assert stats.duration < 0.2
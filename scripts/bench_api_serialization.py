@@ -0,0 +1,82 @@
+"""
+Микробенчмарк сериализации списка бронирований REST API.
+
+Сравнивает прежний путь (экземпляры Booking → dict с isoformat()/float() → JsonResponse)
+с текущим (кортежи values_list → dict → json_codec). Данные строятся в памяти, БД не нужна.
+
+Запуск из корня проекта:
+    python scripts/bench_api_serialization.py [--rows 500] [--repeat 200]
+"""
+import argparse
+import datetime
+import os
+import sys
+import timeit
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hotel_booking.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.http import JsonResponse  # noqa: E402
+
+from booking import json_codec  # noqa: E402
+from booking.models import Booking  # noqa: E402
+from booking.views_api import BOOKING_VALUE_FIELDS, _booking_row_to_json  # noqa: E402
+
+
+def legacy_booking_to_json(booking):
+    return {
+        "id": booking.booking_id,
+        "roomId": booking.room_id,
+        "guestId": booking.guest_id,
+        "status": booking.status,
+        "checkInDate": booking.check_in_date.isoformat(),
+        "checkOutDate": booking.check_out_date.isoformat(),
+        "adultsCount": booking.adults_count,
+        "childrenCount": booking.children_count,
+        "totalPrice": float(booking.total_price),
+        "createdAt": booking.created_at.isoformat() if booking.created_at else None,
+    }
+
+
+def make_rows(count):
+    created = datetime.datetime(2030, 1, 1, 12, 0, 0, 123456, tzinfo=datetime.timezone.utc)
+    check_in = datetime.date(2030, 2, 1)
+    return [
+        (i, i % 50 + 1, i % 300 + 1, "PAYMENT_PENDING", check_in, check_in + datetime.timedelta(days=3),
+         2, 0, Decimal("15000.00"), created + datetime.timedelta(seconds=i))
+        for i in range(1, count + 1)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    # Прежний путь начинался с экземпляров модели — их создание тоже входит в замер
+    legacy = lambda: JsonResponse({  # noqa: E731
+        "items": [legacy_booking_to_json(Booking(**dict(zip(BOOKING_VALUE_FIELDS, row)))) for row in rows],
+    })
+    current = lambda: json_codec.FastJsonResponse({  # noqa: E731
+        "items": [_booking_row_to_json(row) for row in rows],
+    })
+
+    legacy_time = min(timeit.repeat(legacy, number=args.repeat, repeat=3)) / args.repeat
+    current_time = min(timeit.repeat(current, number=args.repeat, repeat=3)) / args.repeat
+    print(f"rows per page:      {args.rows}")
+    print(f"json backend:       {json_codec.BACKEND}")
+    print(f"legacy  (models + JsonResponse): {legacy_time * 1000:8.3f} ms/page")
+    print(f"current (tuples + {json_codec.BACKEND:<7}):     {current_time * 1000:8.3f} ms/page")
+    print(f"speedup:            {legacy_time / current_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
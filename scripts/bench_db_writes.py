@@ -0,0 +1,106 @@
+"""
+Бенчмарк конкурентной записи в SQLite: соединения по умолчанию против профиля БД.
+
+Несколько процессов (как воркеры gunicorn/uvicorn) выполняют транзакции вида
+«прочитать, затем вставить» — так создаётся бронирование. Профиль «default» —
+прежнее подключение (rollback journal, synchronous=FULL, отложенный BEGIN),
+«tuned» — прагмы booking/db_profile.py (те же, что у payment/notification
+service) и BEGIN IMMEDIATE, как в settings.DATABASES.
+
+Запуск из корня проекта:
+    python scripts/bench_db_writes.py [--workers 8] [--transactions 300]
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hotel_booking.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from booking.db_profile import sqlite_pragmas  # noqa: E402
+
+PROFILES = {
+    # (прагмы, начало транзакции)
+    "default": ([], "BEGIN"),
+    "tuned": (sqlite_pragmas(), "BEGIN IMMEDIATE"),
+}
+
+
+def connect(path, profile):
+    pragmas, _ = PROFILES[profile]
+    connection = sqlite3.connect(path, isolation_level=None)
+    for pragma in pragmas:
+        connection.execute(pragma)
+    return connection
+
+
+def worker(args):
+    path, profile, transactions = args
+    _, begin = PROFILES[profile]
+    connection = connect(path, profile)
+    committed = locked = 0
+    for _ in range(transactions):
+        try:
+            connection.execute(begin)
+            (nights,) = connection.execute("SELECT COUNT(*) FROM booking WHERE room_id = ?", (committed % 50,)).fetchone()
+            connection.execute(
+                "INSERT INTO booking (room_id, nights, payload) VALUES (?, ?, ?)",
+                (committed % 50, nights, "x" * 200),
+            )
+            connection.execute("COMMIT")
+            committed += 1
+        except sqlite3.OperationalError as exc:
+            if "locked" not in str(exc) and "busy" not in str(exc):
+                raise
+            locked += 1
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+    connection.close()
+    return committed, locked
+
+
+def run(profile, workers, transactions):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.sqlite3")
+        connection = connect(path, profile)
+        connection.execute(
+            "CREATE TABLE booking (id INTEGER PRIMARY KEY, room_id INTEGER, nights INTEGER, payload TEXT)"
+        )
+        connection.execute("CREATE INDEX booking_room ON booking (room_id)")
+        connection.close()
+
+        started = time.perf_counter()
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(worker, [(path, profile, transactions)] * workers)
+        elapsed = time.perf_counter() - started
+    committed = sum(result[0] for result in results)
+    locked = sum(result[1] for result in results)
+    return committed, locked, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--transactions", type=int, default=300, help="транзакций на процесс")
+    args = parser.parse_args()
+
+    print(f"{args.workers} процессов × {args.transactions} транзакций «чтение + вставка»")
+    for profile in PROFILES:
+        committed, locked, elapsed = run(profile, args.workers, args.transactions)
+        print(
+            f"{profile:>8}: {committed / elapsed:8.0f} коммитов/с, "
+            f"успешно {committed}, «database is locked» {locked}, {elapsed:.2f} с"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Бенчмарк метрик HTTP: метка path из сырого пути против шаблона маршрута.
+
+Через PrometheusMetricsMiddleware проходят запросы GET /api/bookings/<id>/ с
+разными id. Прежний вариант (метка = request.path) создаёт по временному ряду на
+каждый id, текущий (route_label) — один ряд на маршрут. Для каждого варианта
+печатаются накладные расходы middleware на запрос, число рядов в реестре, время
+и размер ответа /metrics. URL разрешается заранее: это делает Django в любом случае.
+Память прежнего варианта растёт линейно (около 4 КиБ на id), поэтому по умолчанию
+он прогоняется на --legacy-ids запросах.
+
+Запуск из корня проекта:
+    python scripts/bench_metrics_labels.py [--ids 1000000] [--legacy-ids 100000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hotel_booking.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.http import HttpResponse  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.urls import resolve  # noqa: E402
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest  # noqa: E402
+
+from booking import middleware  # noqa: E402
+
+
+class LegacyMiddleware(middleware.PrometheusMetricsMiddleware):
+    """Прежнее поведение: метка — сырой путь запроса."""
+
+    @staticmethod
+    def _observe(request, response, duration):
+        middleware.REQUEST_COUNT.labels(request.method, request.path, str(response.status_code)).inc()
+        middleware.REQUEST_LATENCY.labels(request.method, request.path).observe(duration)
+
+
+def _fresh_registry():
+    """Подменяет метрики модуля middleware свежими в отдельном реестре."""
+    registry = CollectorRegistry()
+    middleware.REQUEST_COUNT = Counter("booking_http_requests_total", "", ["method", "path", "status"], registry=registry)
+    middleware.REQUEST_LATENCY = Histogram("booking_http_request_duration_seconds", "", ["method", "path"], registry=registry)
+    return registry
+
+
+def _drive(middleware_class, ids):
+    """Пропускает ids запросов с разными id через middleware; один объект запроса, меняется только путь."""
+    request = RequestFactory().get("/api/bookings/0/")
+    request.resolver_match = resolve("/api/bookings/1/")
+    response = HttpResponse()
+    instance = middleware_class(lambda request: response) if middleware_class else None
+    started = time.perf_counter()
+    for booking_id in range(ids):
+        request.path = f"/api/bookings/{booking_id}/"
+        if instance:
+            instance(request)
+    return time.perf_counter() - started
+
+
+def run(middleware_class, ids):
+    # Время — без tracemalloc, память — отдельным прогоном на свежем реестре
+    _fresh_registry()
+    elapsed = _drive(middleware_class, ids) - _drive(None, ids)
+    registry = _fresh_registry()
+    tracemalloc.start()
+    _drive(middleware_class, ids)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    series = sum(len(metric.samples) for metric in registry.collect())
+    scrape_started = time.perf_counter()
+    body = generate_latest(registry)
+    scrape = time.perf_counter() - scrape_started
+    return elapsed / ids * 1e6, series, memory, scrape, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ids", type=int, default=1_000_000)
+    parser.add_argument("--legacy-ids", type=int, default=100_000, help="запросов для варианта с сырым путём")
+    args = parser.parse_args()
+
+    variants = (
+        ("raw path", LegacyMiddleware, min(args.ids, args.legacy_ids)),
+        ("route", middleware.PrometheusMetricsMiddleware, args.ids),
+    )
+    for name, middleware_class, ids in variants:
+        per_request, series, memory, scrape, size = run(middleware_class, ids)
+        print(
+            f"{name:>9}: {ids} id, {per_request:6.2f} мкс/запрос, рядов {series}, память метрик {memory / 2**20:8.1f} МиБ, "
+            f"/metrics {scrape * 1000:9.1f} мс, {size / 2**20:8.1f} МиБ"
+        )
+
+
+if __name__ == "__main__":
+    main()
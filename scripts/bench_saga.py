@@ -0,0 +1,325 @@
+"""
+Сквозной бенчмарк саги: бронирование → outbox → Kafka → Payment → Notification → PAID.
+
+Работает без Docker и брокера:
+- Booking (Django под uvicorn с --web-workers воркерами) и Notification Service —
+  дочерние процессы на свободных портах, у каждого своя временная SQLite.
+- В процессе бенчмарка — Kafka в памяти (scripts/local_kafka.py), relay outbox
+  (booking.outbox.relay_batch; get_producer() возвращает локальный producer) и
+  consumer Payment Service (app.kafka_consumer.run_kafka_consumer с подменённым
+  AIOKafkaConsumer) в отдельном потоке со своим event loop.
+- Генератор нагрузки (asyncio + httpx) создаёт бронирования POST /api/bookings/ с
+  постоянной частотой --rate по открытой модели: запрос уходит по расписанию, не
+  дожидаясь ответов на предыдущие.
+
+Задержки отсчитываются от запланированного момента отправки, поэтому перегрузка
+не прячется в очереди генератора. Бронирование считается оплаченным, когда consumer
+закончил обработку события: Payment к этому моменту дождался Notification Service,
+а тот — ответа confirm-payment от Booking. Итоговые статусы сверяются по БД.
+Время create→PAID включает паузу relay при пустой очереди (--relay-interval,
+по умолчанию OUTBOX_RELAY_INTERVAL). Relay, Payment (с генерацией PDF-чеков) и
+генератор делят один процесс: при высокой частоте сверяйте загрузку CPU процесса
+бенчмарка, чтобы не измерить его самого.
+
+Запуск из корня проекта:
+    python scripts/bench_saga.py [--rate 50] [--duration 20] [--web-workers 2] [--consumers 1]
+"""
+import argparse
+import asyncio
+import functools
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+WORKDIR = Path(tempfile.mkdtemp(prefix="bench_saga-"))
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+BOOKING_PORT = _free_port()
+NOTIFICATION_PORT = _free_port()
+
+# Окружение задаётся до django.setup() и импорта app.config: его же наследуют дочерние процессы
+os.environ.update({
+    "DJANGO_SETTINGS_MODULE": "hotel_booking.settings",
+    "DATABASE_URL": f"sqlite:///{WORKDIR / 'booking.sqlite3'}",
+    "OCCUPANCY_BITMAP_DIR": str(WORKDIR / "occupancy"),
+    # Воркеры uvicorn — отдельные процессы: кэш общий, как в docker-compose
+    "CACHE_BACKEND": "file",
+    "CACHE_LOCATION": str(WORKDIR / "cache"),
+    "PAYMENT_DATABASE_URL": f"sqlite:///{WORKDIR / 'payment.sqlite3'}",
+    "PAYMENT_RECEIPTS_DIR": str(WORKDIR / "receipts"),
+    "PAYMENT_NOTIFICATION_SERVICE_URL": f"http://127.0.0.1:{NOTIFICATION_PORT}",
+    "PAYMENT_KAFKA_CONSUMER_ENABLED": "true",
+    "NOTIFICATION_DATABASE_URL": f"sqlite:///{WORKDIR / 'notification.sqlite3'}",
+    "NOTIFICATION_BOOKING_SERVICE_URL": f"http://127.0.0.1:{BOOKING_PORT}",
+})
+os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+sys.path.insert(0, str(ROOT))
+sys.path.insert(1, str(ROOT / "payment_service"))
+
+import django  # noqa: E402
+
+django.setup()
+
+import httpx  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connections  # noqa: E402
+from django.db.models import Count  # noqa: E402
+
+from app import kafka_consumer  # noqa: E402
+from app.database import init_db  # noqa: E402
+from booking import kafka_producer  # noqa: E402
+from booking.models import Booking, Guest, Hotel, Room  # noqa: E402
+from booking.outbox import relay_batch  # noqa: E402
+from local_kafka import LocalBroker, LocalKafkaConsumer, LocalKafkaProducer  # noqa: E402
+
+
+def seed(rooms, guests):
+    """Схема и данные временной БД Booking. Возвращает (id номеров, id гостей)."""
+    call_command("migrate", verbosity=0)
+    owner = User.objects.create_user("bench-owner")
+    hotel = Hotel.objects.create(
+        name="Бенчмарк", description="", address="Москва", phone="+7", email="bench@example.com", owner=owner,
+    )
+    room_objects = Room.objects.bulk_create(
+        Room(hotel=hotel, number=str(n), name=f"Номер {n}", description="", type_name="Стандарт", price_per_night=5000)
+        for n in range(rooms)
+    )
+    guest_objects = Guest.objects.bulk_create(
+        Guest(first_name="Гость", last_name=f"Нагрузочный{n}", passport_number=f"BENCH-{n}", phone="+7")
+        for n in range(guests)
+    )
+    connections.close_all()
+    return [room.pk for room in room_objects], [guest.pk for guest in guest_objects]
+
+
+def start_service(app, cwd, port, workers=1):
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+        ],
+        cwd=cwd,
+    )
+
+
+def wait_healthy(url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url}: процесс завершился с кодом {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url}: сервис не ответил за {timeout} с")
+
+
+class PaymentSide(threading.Thread):
+    """Kafka в памяти и consumers Payment Service в отдельном потоке со своим event loop."""
+
+    def __init__(self, consumers):
+        super().__init__(daemon=True)
+        self.consumers = consumers
+        self.paid_at = {}
+        self.broker = None
+        self.ready = threading.Event()
+        self._loop = None
+        self._stopping = None
+
+    def run(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        self.broker = LocalBroker()
+        # relay_batch() берёт producer из get_producer(): подставляем локальный с метриками доставки
+        kafka_producer._producer = kafka_producer.InstrumentedProducer(
+            LocalKafkaProducer(self.broker, **kafka_producer.producer_config())
+        )
+        kafka_consumer.AIOKafkaConsumer = functools.partial(LocalKafkaConsumer, self.broker)
+        handle = kafka_consumer._handle_payment_event
+
+        async def handle_and_record(data):
+            await handle(data)
+            self.paid_at[data["booking_id"]] = time.perf_counter()
+
+        kafka_consumer._handle_payment_event = handle_and_record
+        init_db()
+        tasks = [asyncio.create_task(kafka_consumer.run_kafka_consumer()) for _ in range(self.consumers)]
+        self.ready.set()
+        await self._stopping.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._stopping.set)
+        self.join()
+
+
+def relay_loop(stop, interval):
+    """Как manage.py relay_outbox: полная пачка — сразу следующая, иначе пауза."""
+    try:
+        while not stop.is_set():
+            sent, failed = relay_batch()
+            if failed or sent < settings.OUTBOX_RELAY_BATCH_SIZE:
+                stop.wait(interval)
+    finally:
+        connections.close_all()
+
+
+async def generate(args, rooms, guests):
+    """Создаёт rate × duration бронирований по расписанию. Возвращает (время старта, результаты)."""
+    results = []
+    base_url = f"http://127.0.0.1:{BOOKING_PORT}/api/bookings/"
+    first_night = date.today() + timedelta(days=1)
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        async def create(index, scheduled):
+            # Каждый номер бронируется на одну ночь подряд идущих дат — без конфликтов
+            check_in = first_night + timedelta(days=index // len(rooms))
+            try:
+                response = await client.post(base_url, json={
+                    "roomId": rooms[index % len(rooms)],
+                    "guestId": guests[index % len(guests)],
+                    "checkInDate": check_in.isoformat(),
+                    "checkOutDate": (check_in + timedelta(days=1)).isoformat(),
+                })
+            except httpx.HTTPError as exc:
+                results.append((scheduled, time.perf_counter(), type(exc).__name__, None))
+                return
+            booking_id = response.json()["id"] if response.status_code == 201 else None
+            results.append((scheduled, time.perf_counter(), response.status_code, booking_id))
+
+        started = time.perf_counter()
+        tasks = []
+        for index in range(int(args.rate * args.duration)):
+            scheduled = started + index / args.rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(create(index, scheduled)))
+        await asyncio.gather(*tasks)
+    return started, results
+
+
+async def wait_paid(payment, booking_ids, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline and not booking_ids <= payment.paid_at.keys():
+        await asyncio.sleep(0.05)
+
+
+def percentiles(values):
+    """p50, p95, p99 и максимум в миллисекундах."""
+    if not values:
+        return "нет данных"
+    if len(values) == 1:
+        p50 = p95 = p99 = values[0]
+    else:
+        cuts = statistics.quantiles(values, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    return f"p50 {p50 * 1000:8.1f}  p95 {p95 * 1000:8.1f}  p99 {p99 * 1000:8.1f}  max {max(values) * 1000:8.1f}"
+
+
+def report(args, started, results, paid_at):
+    created = {booking_id: scheduled for scheduled, _, status, booking_id in results if status == 201}
+    errors = {}
+    for _, _, status, _ in results:
+        if status != 201:
+            errors[status] = errors.get(status, 0) + 1
+    finished = max((done for _, done, _, _ in results), default=started)
+    paid = {booking_id: paid_at[booking_id] for booking_id in created if booking_id in paid_at}
+    statuses = dict(
+        Booking.objects.filter(pk__in=created).values_list("status").annotate(count=Count("pk")).order_by()
+    )
+
+    print(
+        f"Цель: {args.rate:g} бронирований/с × {args.duration:g} с = {len(results)} запросов; "
+        f"web-воркеров {args.web_workers}, consumer'ов {args.consumers}, relay раз в {args.relay_interval:g} с"
+    )
+    print(
+        f"Создание:   {len(created)} из {len(results)} (201), ошибки {errors or 'нет'}, "
+        f"{len(created) / (finished - started):.1f}/с"
+    )
+    print(f"  задержка создания, мс:  {percentiles([done - scheduled for scheduled, done, _, _ in results])}")
+    print(f"Оплата:     {len(paid)} из {len(created)} обработано consumer'ом; статусы в БД {statuses}")
+    print(f"  create→PAID, мс:        {percentiles([paid[pk] - created[pk] for pk in paid])}")
+    if paid:
+        window = max(paid.values()) - started
+        print(f"Сага целиком: {len(paid) / window:.1f} событий/с (PAID за {window:.1f} с от первого запроса)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=50, help="целевая частота создания бронирований, в секунду")
+    parser.add_argument("--duration", type=float, default=20, help="длительность нагрузки, секунд")
+    parser.add_argument("--web-workers", type=int, default=2, help="воркеров uvicorn у Booking")
+    parser.add_argument("--consumers", type=int, default=1, help="consumer'ов Payment в одной группе")
+    parser.add_argument("--relay-interval", type=float, default=settings.OUTBOX_RELAY_INTERVAL)
+    parser.add_argument("--connections", type=int, default=200, help="предел HTTP-соединений генератора")
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--guests", type=int, default=100)
+    parser.add_argument("--drain", type=float, default=60, help="ожидание PAID после окончания нагрузки, секунд")
+    args = parser.parse_args()
+
+    processes = []
+    payment = relay = None
+    stop_relay = threading.Event()
+    try:
+        rooms, guests = seed(args.rooms, args.guests)
+        processes.append(start_service("hotel_booking.asgi:application", ROOT, BOOKING_PORT, args.web_workers))
+        processes.append(start_service("app.main:app", ROOT / "notification_service", NOTIFICATION_PORT))
+        wait_healthy(f"http://127.0.0.1:{BOOKING_PORT}/api/health/", processes[0])
+        wait_healthy(f"http://127.0.0.1:{NOTIFICATION_PORT}/health", processes[1])
+
+        payment = PaymentSide(args.consumers)
+        payment.start()
+        payment.ready.wait()
+        relay = threading.Thread(target=relay_loop, args=(stop_relay, args.relay_interval), daemon=True)
+        relay.start()
+
+        async def load():
+            started, results = await generate(args, rooms, guests)
+            created = {booking_id for _, _, status, booking_id in results if status == 201}
+            await wait_paid(payment, created, args.drain)
+            return started, results
+
+        started, results = asyncio.run(load())
+        stop_relay.set()
+        relay.join()
+        report(args, started, results, dict(payment.paid_at))
+    finally:
+        stop_relay.set()
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+        if payment is not None and payment.is_alive():
+            payment.stop()
+        connections.close_all()
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Kafka в памяти процесса для бенчмарков без брокера.
+
+LocalBroker хранит журнал каждого топика и очередь asyncio на каждую группу
+потребителей: потребители одной группы делят сообщения между собой, как
+участники группы на разных партициях. LocalKafkaProducer повторяет нужную
+booking/outbox.py часть API KafkaProducer (kafka-python) и может публиковать из
+любого потока (relay_outbox работает в синхронном коде). LocalKafkaConsumer
+повторяет API AIOKafkaConsumer, который использует payment_service.app.kafka_consumer.
+Сообщения проходят через value_serializer/value_deserializer, как в настоящем клиенте.
+"""
+import asyncio
+import itertools
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+
+@dataclass
+class LocalRecord:
+    """Сообщение в том виде, в каком его отдаёт AIOKafkaConsumer (используемые поля)."""
+
+    topic: str
+    partition: int
+    offset: int
+    timestamp: int
+    value: bytes
+    key: bytes | None = None
+
+
+class LocalBroker:
+    """Журналы топиков и очереди групп потребителей; живёт в event loop потребителей."""
+
+    def __init__(self, loop=None):
+        self._loop = loop or asyncio.get_running_loop()
+        self._lock = threading.Lock()
+        self._logs = defaultdict(list)
+        self._groups = defaultdict(dict)
+        self._offsets = defaultdict(itertools.count)
+
+    def publish(self, topic, value, key=None):
+        """Дописывает сообщение в топик и раздаёт его группам. Можно вызывать из любого потока."""
+        with self._lock:
+            record = LocalRecord(topic, 0, next(self._offsets[topic]), int(time.time() * 1000), value, key)
+            self._logs[topic].append(record)
+            queues = list(self._groups[topic].values())
+        for queue in queues:
+            self._loop.call_soon_threadsafe(queue.put_nowait, record)
+        return record
+
+    def subscribe(self, topic, group_id):
+        """Очередь группы; новая группа начинает с начала журнала (auto_offset_reset=earliest)."""
+        with self._lock:
+            queue = self._groups[topic].get(group_id)
+            if queue is None:
+                queue = self._groups[topic][group_id] = asyncio.Queue()
+                for record in self._logs[topic]:
+                    queue.put_nowait(record)
+        return queue
+
+    def published(self, topic):
+        return len(self._logs[topic])
+
+
+class LocalFuture:
+    """Future доставки в стиле kafka-python: сообщение подтверждается сразу при публикации."""
+
+    def __init__(self, metadata=None, exception=None):
+        self.value = metadata
+        self.exception = exception
+
+    def failed(self):
+        return self.exception is not None
+
+    def succeeded(self):
+        return self.exception is None
+
+    def get(self, timeout=None):
+        if self.exception is not None:
+            raise self.exception
+        return self.value
+
+    def add_callback(self, callback):
+        if self.exception is None:
+            callback(self.value)
+        return self
+
+    def add_errback(self, errback):
+        if self.exception is not None:
+            errback(self.exception)
+        return self
+
+
+class LocalKafkaProducer:
+    """Замена KafkaProducer: принимает те же параметры (producer_config()), лишние игнорирует."""
+
+    def __init__(self, broker, value_serializer=None, key_serializer=None, **config):
+        self._broker = broker
+        self._value_serializer = value_serializer or (lambda value: value)
+        self._key_serializer = key_serializer or (lambda key: key)
+
+    def send(self, topic, value=None, key=None):
+        try:
+            record = self._broker.publish(
+                topic,
+                self._value_serializer(value),
+                self._key_serializer(key) if key is not None else None,
+            )
+        except Exception as exc:
+            return LocalFuture(exception=exc)
+        return LocalFuture(metadata=record)
+
+    def flush(self, timeout=None):
+        pass
+
+    def close(self, timeout=None):
+        pass
+
+
+class LocalKafkaConsumer:
+    """Замена AIOKafkaConsumer для одного топика: start/stop и асинхронная итерация."""
+
+    def __init__(self, broker, topic, group_id=None, value_deserializer=None, **config):
+        self._broker = broker
+        self._topic = topic
+        self._group_id = group_id or f"anonymous-{id(self)}"
+        self._value_deserializer = value_deserializer or (lambda value: value)
+        self._queue = None
+
+    async def start(self):
+        self._queue = self._broker.subscribe(self._topic, self._group_id)
+
+    async def stop(self):
+        self._queue = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._queue is None:
+            raise StopAsyncIteration
+        record = await self._queue.get()
+        return LocalRecord(
+            record.topic, record.partition, record.offset, record.timestamp,
+            self._value_deserializer(record.value), record.key,
+        )